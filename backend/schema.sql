@@ -26,7 +26,7 @@ CREATE TABLE IF NOT EXISTS products (
     sku VARCHAR(50) UNIQUE NOT NULL,
     product_name VARCHAR(255) NOT NULL,
     category VARCHAR(100),
-    brand VARCHAR(100),
+    brand VARCHAR(100) NOT NULL DEFAULT '',
     zone VARCHAR(10),
     aisle INT,
     rack INT,
@@ -35,20 +35,68 @@ CREATE TABLE IF NOT EXISTS products (
     full_location_code VARCHAR(50),
     quantity_available INT DEFAULT 0,
     reorder_level INT DEFAULT 10,
-    supplier VARCHAR(100),
-    image_url VARCHAR(500),
-    selling_price DECIMAL(10,2) DEFAULT 0,
-    mrp DECIMAL(10,2) DEFAULT 0,
-    unit VARCHAR(20) DEFAULT 'piece',
-    gst_percentage DECIMAL(5,2) DEFAULT 18,
+    supplier VARCHAR(100) NOT NULL DEFAULT '',
+    image_url VARCHAR(500) NOT NULL DEFAULT '',
+    selling_price DECIMAL(10,2) NOT NULL DEFAULT 0,
+    mrp DECIMAL(10,2) NOT NULL DEFAULT 0,
+    unit VARCHAR(20) NOT NULL DEFAULT 'piece',
+    gst_percentage DECIMAL(5,2) NOT NULL DEFAULT 18,
     last_updated DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     INDEX idx_sku (sku),
     INDEX idx_category (category),
     INDEX idx_zone (zone),
-    INDEX idx_location (full_location_code)
+    INDEX idx_location (full_location_code),
+    INDEX idx_product_name (product_name)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- Upgrade existing products tables to the NOT NULL defaults above; skipped once every
+-- display column is NOT NULL, so re-importing the schema does not rewrite the table
+SET @nullable_columns = (
+    SELECT COUNT(*) FROM information_schema.columns
+    WHERE table_schema = DATABASE() AND table_name = 'products' AND is_nullable = 'YES'
+    AND column_name IN ('brand', 'supplier', 'image_url', 'selling_price', 'mrp', 'unit', 'gst_percentage')
+);
+
+SET @ddl = IF(@nullable_columns > 0,
+    'UPDATE products SET
+        brand = IFNULL(brand, ''''), supplier = IFNULL(supplier, ''''), image_url = IFNULL(image_url, ''''),
+        selling_price = IFNULL(selling_price, 0), mrp = IFNULL(mrp, 0),
+        unit = IF(unit IS NULL OR unit = '''', ''piece'', unit), gst_percentage = IFNULL(gst_percentage, 18)
+     WHERE brand IS NULL OR supplier IS NULL OR image_url IS NULL OR selling_price IS NULL
+        OR mrp IS NULL OR unit IS NULL OR unit = '''' OR gst_percentage IS NULL',
+    'DO 0'
+);
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @ddl = IF(@nullable_columns > 0,
+    'ALTER TABLE products
+        MODIFY brand VARCHAR(100) NOT NULL DEFAULT '''',
+        MODIFY supplier VARCHAR(100) NOT NULL DEFAULT '''',
+        MODIFY image_url VARCHAR(500) NOT NULL DEFAULT '''',
+        MODIFY selling_price DECIMAL(10,2) NOT NULL DEFAULT 0,
+        MODIFY mrp DECIMAL(10,2) NOT NULL DEFAULT 0,
+        MODIFY unit VARCHAR(20) NOT NULL DEFAULT ''piece'',
+        MODIFY gst_percentage DECIMAL(5,2) NOT NULL DEFAULT 18',
+    'DO 0'
+);
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Catalogue pages read products in name order; add the index to existing tables
+SET @ddl = IF(
+    (SELECT COUNT(*) FROM information_schema.statistics
+     WHERE table_schema = DATABASE() AND table_name = 'products' AND index_name = 'idx_product_name') = 0,
+    'ALTER TABLE products ADD INDEX idx_product_name (product_name)',
+    'DO 0'
+);
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
 -- Orders Table
 CREATE TABLE IF NOT EXISTS orders (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -121,3 +169,50 @@ CREATE TABLE IF NOT EXISTS presence_logs (
     INDEX idx_employee_id (employee_id),
     INDEX idx_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Categories Table (kept in sync with products.category by the triggers below)
+CREATE TABLE IF NOT EXISTS categories (
+    name VARCHAR(100) PRIMARY KEY
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT IGNORE INTO categories (name)
+    SELECT DISTINCT category FROM products WHERE category IS NOT NULL AND category != '';
+
+DROP TRIGGER IF EXISTS trg_products_category_insert;
+CREATE TRIGGER trg_products_category_insert AFTER INSERT ON products FOR EACH ROW
+    INSERT IGNORE INTO categories (name)
+        SELECT NEW.category FROM DUAL WHERE NEW.category IS NOT NULL AND NEW.category != '';
+
+DROP TRIGGER IF EXISTS trg_products_category_update;
+CREATE TRIGGER trg_products_category_update AFTER UPDATE ON products FOR EACH ROW
+    INSERT IGNORE INTO categories (name)
+        SELECT NEW.category FROM DUAL WHERE NEW.category IS NOT NULL AND NEW.category != '';
+
+DROP TRIGGER IF EXISTS trg_products_category_update_cleanup;
+CREATE TRIGGER trg_products_category_update_cleanup AFTER UPDATE ON products FOR EACH ROW
+    DELETE FROM categories
+        WHERE name = OLD.category AND NOT (OLD.category <=> NEW.category)
+        AND NOT EXISTS (SELECT 1 FROM products WHERE category = OLD.category);
+
+DROP TRIGGER IF EXISTS trg_products_category_delete;
+CREATE TRIGGER trg_products_category_delete AFTER DELETE ON products FOR EACH ROW
+    DELETE FROM categories
+        WHERE name = OLD.category
+        AND NOT EXISTS (SELECT 1 FROM products WHERE category = OLD.category);
+
+-- Order Counter (last allocated ORD-NNNN number; orders inserted with an explicit
+-- ORD-NNNN id advance it through the trigger below)
+CREATE TABLE IF NOT EXISTS order_counter (
+    id INT PRIMARY KEY,
+    next_val INT NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT IGNORE INTO order_counter (id, next_val)
+    SELECT 1, COALESCE(MAX(CAST(SUBSTRING(order_number, 5) AS UNSIGNED)), 0)
+    FROM orders WHERE order_number REGEXP '^ORD-[0-9]{4}$';
+
+DROP TRIGGER IF EXISTS trg_orders_counter_insert;
+CREATE TRIGGER trg_orders_counter_insert AFTER INSERT ON orders FOR EACH ROW
+    UPDATE order_counter
+        SET next_val = GREATEST(next_val, CAST(SUBSTRING(NEW.order_number, 5) AS UNSIGNED))
+        WHERE id = 1 AND NEW.order_number REGEXP '^ORD-[0-9]{4}$';
@@ -1,18 +1,26 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Response, Header
 from fastapi import status as http_status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 import os
 import logging
 from pathlib import Path
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
 from typing import List, Optional
 import uuid
+import time
+import hashlib
 from datetime import datetime, timezone
 import jwt
 import bcrypt
 import aiomysql
+from pymysql.constants import FIELD_TYPE
+from pymysql.converters import conversions
+import orjson
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -27,6 +35,21 @@ MYSQL_CONFIG = {
     'charset': 'utf8mb4'
 }
 
+# DECIMAL columns (prices, GST) decode straight to float instead of Decimal
+MYSQL_CONVERSIONS = dict(conversions)
+MYSQL_CONVERSIONS[FIELD_TYPE.DECIMAL] = float
+MYSQL_CONVERSIONS[FIELD_TYPE.NEWDECIMAL] = float
+
+# Connections per worker process; keep workers * DB_POOL_SIZE under MySQL max_connections
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '10'))
+
+# CORS: fixed storefront origins plus any comma-separated CORS_ORIGINS entries
+ALLOWED_ORIGINS = [
+    "https://www.sellandiammantraders.com",
+    "https://sellandiammantraders.com",
+    "http://localhost:3000",
+] + [o.strip() for o in os.environ.get('CORS_ORIGINS', '*').split(',') if o.strip()]
+
 # JWT Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'sellandiamman-traders-secret-key-2024')
 JWT_ALGORITHM = "HS256"
@@ -34,6 +57,16 @@ JWT_ALGORITHM = "HS256"
 # Database pool
 pool = None
 
+# Serialized /api/public/categories payload, dropped on any product write
+CATEGORIES_CACHE_TTL = 60
+_categories_cache = {"body": None, "expires": 0.0}
+
+# Encoded /api/public/catalogue pages and their ETags, keyed by the normalised request and
+# dropped on any product write; the oldest entry goes once the cap is reached
+CATALOGUE_CACHE_TTL = 30
+CATALOGUE_CACHE_MAX_ENTRIES = 256
+_catalogue_cache = {}
+
 # Create the main app
 app = FastAPI(title="Sellandiamman Traders API")
 
@@ -164,6 +197,9 @@ class OrderCreate(BaseModel):
     items: List[OrderItemBase]
     order_id: Optional[str] = None
 
+class OrderBulkCreate(BaseModel):
+    orders: List[OrderCreate] = Field(..., min_length=1, max_length=100)
+
 class OrderResponse(BaseModel):
     id: int
     order_number: str
@@ -191,6 +227,10 @@ class OrderUpdateItemQty(BaseModel):
     quantity_required: int = Field(..., ge=1)
     reason: Optional[str] = None
 
+class OrderBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=500)
+    reason: Optional[str] = None
+
 class DashboardStats(BaseModel):
     total_products: int
     total_stock_units: int
@@ -211,14 +251,24 @@ class PublicProduct(BaseModel):
 
 # ==================== HELPER FUNCTIONS ====================
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match is a list of entity tags compared weakly (RFC 9110 13.1.2)
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag == "*" or tag.removeprefix("W/") == opaque for tag in tags)
+
 def generate_location_code(zone: str, aisle: int, rack: int, shelf: int, bin: int) -> str:
     return f"{zone}-{str(aisle).zfill(2)}-R{str(rack).zfill(2)}-S{shelf}-B{str(bin).zfill(2)}"
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+# bcrypt releases the GIL, so a worker thread keeps the event loop free while it hashes
+async def hash_password(password: str) -> str:
+    hashed = await run_in_threadpool(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt())
+    return hashed.decode('utf-8')
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+async def verify_password(password: str, hashed: str) -> bool:
+    return await run_in_threadpool(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
 
 def create_token(user_id: int, email: str, role: str, name: str) -> str:
     payload = {
@@ -230,11 +280,22 @@ def create_token(user_id: int, email: str, role: str, name: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-async def get_db():
-    global pool
-    if pool is None:
-        pool = await aiomysql.create_pool(**MYSQL_CONFIG)
-    return pool
+def invalidate_product_caches():
+    _categories_cache["body"] = None
+    _categories_cache["expires"] = 0.0
+    _catalogue_cache.clear()
+
+@asynccontextmanager
+async def transaction():
+    # The pool runs in autocommit mode, so multi-statement writes opt in explicitly
+    async with pool.acquire() as conn:
+        await conn.begin()
+        try:
+            yield conn
+        except BaseException:
+            await conn.rollback()
+            raise
+        await conn.commit()
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
@@ -255,8 +316,7 @@ async def require_admin(user: dict = Depends(get_current_user)):
 
 @auth_router.post("/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute(
                 "SELECT * FROM employees WHERE email = %s",
@@ -267,7 +327,7 @@ async def login(request: LoginRequest):
     if not employee:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not verify_password(request.password, employee.get("password_hash", "")):
+    if not await verify_password(request.password, employee.get("password_hash", "")):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     if employee.get("status") != "active":
@@ -293,8 +353,7 @@ async def login(request: LoginRequest):
 
 @auth_router.get("/me", response_model=EmployeeResponse)
 async def get_me(user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM employees WHERE id = %s", (user["user_id"],))
             employee = await cur.fetchone()
@@ -315,8 +374,7 @@ async def get_me(user: dict = Depends(get_current_user)):
 
 @auth_router.post("/change-password")
 async def change_own_password(request: ChangePasswordRequest, user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM employees WHERE id = %s", (user["user_id"],))
             employee = await cur.fetchone()
@@ -324,22 +382,21 @@ async def change_own_password(request: ChangePasswordRequest, user: dict = Depen
     if not employee:
         raise HTTPException(status_code=404, detail="User not found")
     
-    if not verify_password(request.current_password, employee.get("password_hash", "")):
+    if not await verify_password(request.current_password, employee.get("password_hash", "")):
         raise HTTPException(status_code=401, detail="Current password is incorrect")
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "UPDATE employees SET password_hash = %s, force_password_change = 0 WHERE id = %s",
-                (hash_password(request.new_password), user["user_id"])
+                (await hash_password(request.new_password), user["user_id"])
             )
     
     return {"message": "Password changed successfully"}
 
 @auth_router.post("/set-security-question")
 async def set_security_question(request: SetSecurityQuestionRequest, user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM employees WHERE id = %s", (user["user_id"],))
             employee = await cur.fetchone()
@@ -347,22 +404,21 @@ async def set_security_question(request: SetSecurityQuestionRequest, user: dict
     if not employee:
         raise HTTPException(status_code=404, detail="User not found")
     
-    if not verify_password(request.current_password, employee.get("password_hash", "")):
+    if not await verify_password(request.current_password, employee.get("password_hash", "")):
         raise HTTPException(status_code=401, detail="Current password is incorrect")
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "UPDATE employees SET security_question = %s, security_answer_hash = %s WHERE id = %s",
-                (request.security_question, hash_password(request.security_answer.lower().strip()), user["user_id"])
+                (request.security_question, await hash_password(request.security_answer.lower().strip()), user["user_id"])
             )
     
     return {"message": "Security question set successfully"}
 
 @auth_router.get("/security-question/{email}")
 async def get_security_question(email: str):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM employees WHERE email = %s", (email,))
             employee = await cur.fetchone()
@@ -381,8 +437,7 @@ async def get_security_question(email: str):
 
 @auth_router.post("/reset-password-with-security")
 async def reset_password_with_security(request: AdminResetPasswordRequest):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM employees WHERE email = %s", (request.email,))
             employee = await cur.fetchone()
@@ -397,14 +452,14 @@ async def reset_password_with_security(request: AdminResetPasswordRequest):
     if not security_answer_hash:
         raise HTTPException(status_code=400, detail="No security question set")
     
-    if not verify_password(request.security_answer.lower().strip(), security_answer_hash):
+    if not await verify_password(request.security_answer.lower().strip(), security_answer_hash):
         raise HTTPException(status_code=401, detail="Incorrect security answer")
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "UPDATE employees SET password_hash = %s, force_password_change = 0 WHERE email = %s",
-                (hash_password(request.new_password), request.email)
+                (await hash_password(request.new_password), request.email)
             )
     
     return {"message": "Password reset successfully. You can now login."}
@@ -413,8 +468,7 @@ async def reset_password_with_security(request: AdminResetPasswordRequest):
 
 @employees_router.post("", response_model=EmployeeResponse)
 async def create_employee(employee: EmployeeCreate, user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT id FROM employees WHERE email = %s", (employee.email,))
             existing = await cur.fetchone()
@@ -422,12 +476,12 @@ async def create_employee(employee: EmployeeCreate, user: dict = Depends(require
     if existing:
         raise HTTPException(status_code=400, detail="Email already exists")
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 """INSERT INTO employees (name, email, role, status, password_hash, presence_status, created_at) 
                    VALUES (%s, %s, %s, 'active', %s, 'present', NOW())""",
-                (employee.name, employee.email, employee.role, hash_password(employee.password))
+                (employee.name, employee.email, employee.role, await hash_password(employee.password))
             )
             emp_id = cur.lastrowid
     
@@ -442,8 +496,7 @@ async def create_employee(employee: EmployeeCreate, user: dict = Depends(require
 
 @employees_router.get("", response_model=List[EmployeeResponse])
 async def get_employees(user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM employees ORDER BY created_at DESC")
             employees = await cur.fetchall()
@@ -452,7 +505,7 @@ async def get_employees(user: dict = Depends(require_admin)):
     for emp in employees:
         presence_updated_by_name = None
         if emp.get("presence_updated_by"):
-            async with db.acquire() as conn:
+            async with pool.acquire() as conn:
                 async with conn.cursor(aiomysql.DictCursor) as cur:
                     await cur.execute("SELECT name FROM employees WHERE id = %s", (emp["presence_updated_by"],))
                     updater = await cur.fetchone()
@@ -477,8 +530,7 @@ async def get_employees(user: dict = Depends(require_admin)):
 
 @employees_router.get("/presence-log")
 async def get_presence_log(limit: int = 50, user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute(
                 "SELECT * FROM presence_logs ORDER BY created_at DESC LIMIT %s",
@@ -489,8 +541,7 @@ async def get_presence_log(limit: int = 50, user: dict = Depends(require_admin))
 
 @employees_router.patch("/{employee_id}/presence")
 async def update_presence_status(employee_id: int, update: PresenceStatusUpdate, user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM employees WHERE id = %s", (employee_id,))
             employee = await cur.fetchone()
@@ -501,7 +552,7 @@ async def update_presence_status(employee_id: int, update: PresenceStatusUpdate,
     previous_status = employee.get("presence_status", "present")
     new_status = update.presence_status
     
-    async with db.acquire() as conn:
+    async with transaction() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 """UPDATE employees SET presence_status = %s, presence_updated_at = NOW(), 
@@ -521,8 +572,7 @@ async def delete_employee(employee_id: int, user: dict = Depends(require_admin))
     if user["user_id"] == employee_id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             result = await cur.execute("DELETE FROM employees WHERE id = %s", (employee_id,))
     
@@ -532,8 +582,7 @@ async def delete_employee(employee_id: int, user: dict = Depends(require_admin))
 
 @employees_router.patch("/{employee_id}/status")
 async def toggle_employee_status(employee_id: int, user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT status FROM employees WHERE id = %s", (employee_id,))
             employee = await cur.fetchone()
@@ -543,7 +592,7 @@ async def toggle_employee_status(employee_id: int, user: dict = Depends(require_
     
     new_status = "inactive" if employee["status"] == "active" else "active"
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             await cur.execute("UPDATE employees SET status = %s WHERE id = %s", (new_status, employee_id))
     
@@ -551,8 +600,7 @@ async def toggle_employee_status(employee_id: int, user: dict = Depends(require_
 
 @employees_router.post("/{employee_id}/reset-password")
 async def reset_staff_password(employee_id: int, request: ResetStaffPasswordRequest, user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM employees WHERE id = %s", (employee_id,))
             employee = await cur.fetchone()
@@ -563,11 +611,11 @@ async def reset_staff_password(employee_id: int, request: ResetStaffPasswordRequ
     if employee.get("role") == "admin" and employee["id"] != user["user_id"]:
         raise HTTPException(status_code=403, detail="Cannot reset another admin's password. Use security question reset.")
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "UPDATE employees SET password_hash = %s, force_password_change = %s WHERE id = %s",
-                (hash_password(request.new_password), 1 if request.force_change_on_login else 0, employee_id)
+                (await hash_password(request.new_password), 1 if request.force_change_on_login else 0, employee_id)
             )
     
     return {"message": f"Password reset for {employee['name']}", "force_change_on_login": request.force_change_on_login}
@@ -576,8 +624,7 @@ async def reset_staff_password(employee_id: int, request: ResetStaffPasswordRequ
 
 @products_router.post("", response_model=ProductResponse)
 async def create_product(product: ProductCreate, user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT id FROM products WHERE sku = %s", (product.sku,))
             existing = await cur.fetchone()
@@ -586,8 +633,10 @@ async def create_product(product: ProductCreate, user: dict = Depends(require_ad
         raise HTTPException(status_code=400, detail="SKU already exists")
     
     full_location_code = generate_location_code(product.zone, product.aisle, product.rack, product.shelf, product.bin)
+    # 0% is a real GST rate (exempt goods); only a missing value falls back to 18
+    gst_percentage = 18 if product.gst_percentage is None else product.gst_percentage
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 """INSERT INTO products (sku, product_name, category, brand, zone, aisle, rack, shelf, bin, 
@@ -598,9 +647,10 @@ async def create_product(product: ProductCreate, user: dict = Depends(require_ad
                  product.aisle, product.rack, product.shelf, product.bin, full_location_code,
                  product.quantity_available, product.reorder_level, product.supplier or "", 
                  product.image_url or "", product.selling_price, product.mrp or 0, 
-                 product.unit or "piece", product.gst_percentage or 18)
+                 product.unit or "piece", gst_percentage)
             )
             prod_id = cur.lastrowid
+    invalidate_product_caches()
     
     return ProductResponse(
         id=prod_id, sku=product.sku, product_name=product.product_name, category=product.category,
@@ -609,7 +659,7 @@ async def create_product(product: ProductCreate, user: dict = Depends(require_ad
         quantity_available=product.quantity_available, reorder_level=product.reorder_level,
         supplier=product.supplier or "", image_url=product.image_url or "", 
         selling_price=product.selling_price, mrp=product.mrp or 0, unit=product.unit or "piece",
-        gst_percentage=product.gst_percentage or 18, last_updated=datetime.now(timezone.utc).isoformat()
+        gst_percentage=gst_percentage, last_updated=datetime.now(timezone.utc).isoformat()
     )
 
 @products_router.get("", response_model=List[ProductResponse])
@@ -622,7 +672,6 @@ async def get_products(
     skip: int = 0,
     user: dict = Depends(get_current_user)
 ):
-    db = await get_db()
     query = "SELECT * FROM products WHERE 1=1"
     params = []
     
@@ -644,35 +693,33 @@ async def get_products(
     
     query += f" ORDER BY product_name LIMIT {min(limit, 500)} OFFSET {skip}"
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute(query, params)
             products = await cur.fetchall()
     
     return [ProductResponse(
         id=p["id"], sku=p["sku"], product_name=p["product_name"], category=p["category"],
-        brand=p["brand"] or "", zone=p["zone"], aisle=p["aisle"], rack=p["rack"],
+        brand=p["brand"], zone=p["zone"], aisle=p["aisle"], rack=p["rack"],
         shelf=p["shelf"], bin=p["bin"], full_location_code=p["full_location_code"],
         quantity_available=p["quantity_available"], reorder_level=p["reorder_level"],
-        supplier=p["supplier"] or "", image_url=p["image_url"] or "",
-        selling_price=float(p["selling_price"] or 0), mrp=float(p["mrp"] or 0),
-        unit=p["unit"] or "piece", gst_percentage=float(p["gst_percentage"] or 18),
+        supplier=p["supplier"], image_url=p["image_url"],
+        selling_price=p["selling_price"], mrp=p["mrp"],
+        unit=p["unit"], gst_percentage=p["gst_percentage"],
         last_updated=str(p["last_updated"])
     ) for p in products]
 
 @products_router.get("/categories")
 async def get_categories(user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
-            await cur.execute("SELECT DISTINCT category FROM products ORDER BY category")
+            await cur.execute("SELECT name FROM categories ORDER BY name")
             categories = await cur.fetchall()
-    return [c[0] for c in categories if c[0]]
+    return [c[0] for c in categories]
 
 @products_router.get("/zones")
 async def get_zones(user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             await cur.execute("SELECT DISTINCT zone FROM products ORDER BY zone")
             zones = await cur.fetchall()
@@ -680,8 +727,7 @@ async def get_zones(user: dict = Depends(get_current_user)):
 
 @products_router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(product_id: int, user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM products WHERE id = %s", (product_id,))
             p = await cur.fetchone()
@@ -691,19 +737,18 @@ async def get_product(product_id: int, user: dict = Depends(get_current_user)):
     
     return ProductResponse(
         id=p["id"], sku=p["sku"], product_name=p["product_name"], category=p["category"],
-        brand=p["brand"] or "", zone=p["zone"], aisle=p["aisle"], rack=p["rack"],
+        brand=p["brand"], zone=p["zone"], aisle=p["aisle"], rack=p["rack"],
         shelf=p["shelf"], bin=p["bin"], full_location_code=p["full_location_code"],
         quantity_available=p["quantity_available"], reorder_level=p["reorder_level"],
-        supplier=p["supplier"] or "", image_url=p["image_url"] or "",
-        selling_price=float(p["selling_price"] or 0), mrp=float(p["mrp"] or 0),
-        unit=p["unit"] or "piece", gst_percentage=float(p["gst_percentage"] or 18),
+        supplier=p["supplier"], image_url=p["image_url"],
+        selling_price=p["selling_price"], mrp=p["mrp"],
+        unit=p["unit"], gst_percentage=p["gst_percentage"],
         last_updated=str(p["last_updated"])
     )
 
 @products_router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(product_id: int, product: ProductCreate, user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT id FROM products WHERE id = %s", (product_id,))
             existing = await cur.fetchone()
@@ -711,7 +756,7 @@ async def update_product(product_id: int, product: ProductCreate, user: dict = D
     if not existing:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT id FROM products WHERE sku = %s AND id != %s", (product.sku, product_id))
             sku_check = await cur.fetchone()
@@ -720,8 +765,9 @@ async def update_product(product_id: int, product: ProductCreate, user: dict = D
         raise HTTPException(status_code=400, detail="SKU already exists")
     
     full_location_code = generate_location_code(product.zone, product.aisle, product.rack, product.shelf, product.bin)
+    gst_percentage = 18 if product.gst_percentage is None else product.gst_percentage
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 """UPDATE products SET sku=%s, product_name=%s, category=%s, brand=%s, zone=%s, 
@@ -732,8 +778,9 @@ async def update_product(product_id: int, product: ProductCreate, user: dict = D
                  product.aisle, product.rack, product.shelf, product.bin, full_location_code,
                  product.quantity_available, product.reorder_level, product.supplier or "",
                  product.image_url or "", product.selling_price, product.mrp or 0,
-                 product.unit or "piece", product.gst_percentage or 18, product_id)
+                 product.unit or "piece", gst_percentage, product_id)
             )
+    invalidate_product_caches()
     
     return ProductResponse(
         id=product_id, sku=product.sku, product_name=product.product_name, category=product.category,
@@ -742,24 +789,34 @@ async def update_product(product_id: int, product: ProductCreate, user: dict = D
         quantity_available=product.quantity_available, reorder_level=product.reorder_level,
         supplier=product.supplier or "", image_url=product.image_url or "",
         selling_price=product.selling_price, mrp=product.mrp or 0, unit=product.unit or "piece",
-        gst_percentage=product.gst_percentage or 18, last_updated=datetime.now(timezone.utc).isoformat()
+        gst_percentage=gst_percentage, last_updated=datetime.now(timezone.utc).isoformat()
     )
 
+@products_router.delete("/by-sku/{sku}")
+async def delete_product_by_sku(sku: str, user: dict = Depends(require_admin)):
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            result = await cur.execute("DELETE FROM products WHERE sku = %s", (sku,))
+    
+    if result == 0:
+        raise HTTPException(status_code=404, detail="Product not found")
+    invalidate_product_caches()
+    return {"message": "Product deleted"}
+
 @products_router.delete("/{product_id}")
 async def delete_product(product_id: int, user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             result = await cur.execute("DELETE FROM products WHERE id = %s", (product_id,))
     
     if result == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    invalidate_product_caches()
     return {"message": "Product deleted"}
 
 @products_router.patch("/{product_id}/stock")
 async def adjust_stock(product_id: int, quantity: int, reason: str = "manual_adjustment", user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM products WHERE id = %s", (product_id,))
             product = await cur.fetchone()
@@ -771,7 +828,7 @@ async def adjust_stock(product_id: int, quantity: int, reason: str = "manual_adj
     if new_quantity < 0:
         raise HTTPException(status_code=400, detail="Stock cannot be negative")
     
-    async with db.acquire() as conn:
+    async with transaction() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 "UPDATE products SET quantity_available = %s, last_updated = NOW() WHERE id = %s",
@@ -788,71 +845,55 @@ async def adjust_stock(product_id: int, quantity: int, reason: str = "manual_adj
 # ==================== ORDER ROUTES ====================
 
 async def generate_next_order_number():
-    db = await get_db()
-    async with db.acquire() as conn:
+    # Preview only: the number is not reserved until an order is inserted
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
-            await cur.execute(
-                """SELECT order_number FROM orders WHERE order_number REGEXP '^ORD-[0-9]{4}$' 
-                   ORDER BY CAST(SUBSTRING(order_number, 5) AS UNSIGNED) DESC LIMIT 1"""
-            )
+            await cur.execute("SELECT next_val + 1 FROM order_counter WHERE id = 1")
             result = await cur.fetchone()
     
-    if result:
-        next_num = int(result[0][4:]) + 1
-    else:
-        next_num = 1
-    
+    next_num = result[0] if result else 1
     return f"ORD-{str(next_num).zfill(4)}"
 
+async def lock_order_counter(cur) -> int:
+    # Lock the counter row so concurrent creates wait instead of reusing numbers; the
+    # insert trigger advances it as each ORD-NNNN order is written
+    await cur.execute("SELECT next_val FROM order_counter WHERE id = 1 FOR UPDATE")
+    counter = await cur.fetchone()
+    if counter is None:
+        raise HTTPException(status_code=500, detail="Order counter is not initialised")
+    return counter["next_val"] + 1
+
 @orders_router.get("/next-order-id")
 async def get_next_order_id(user: dict = Depends(get_current_user)):
     next_id = await generate_next_order_number()
     return {"next_order_id": next_id}
 
-@orders_router.post("", response_model=OrderResponse)
-async def create_order(order: OrderCreate, user: dict = Depends(get_current_user)):
-    db = await get_db()
-    
-    if order.order_id and order.order_id.strip():
-        async with db.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("SELECT id FROM orders WHERE order_number = %s", (order.order_id,))
-                existing = await cur.fetchone()
-        if existing:
-            raise HTTPException(status_code=400, detail=f"Order ID {order.order_id} already exists")
-        order_number = order.order_id.strip().upper()
-    else:
-        order_number = await generate_next_order_number()
-    
-    async with db.acquire() as conn:
-        async with conn.cursor() as cur:
-            await cur.execute(
-                """INSERT INTO orders (order_number, customer_name, created_by, created_by_name, status, created_at) 
-                   VALUES (%s, %s, %s, %s, 'pending', NOW())""",
-                (order_number, order.customer_name, user["user_id"], user["name"])
-            )
-            order_id = cur.lastrowid
+async def insert_order(cur, order: OrderCreate, order_number: str, user: dict) -> OrderResponse:
+    # Runs inside the caller's transaction with a DictCursor; an unknown SKU raises and
+    # rolls back the order header as well as any items already inserted
+    await cur.execute(
+        """INSERT INTO orders (order_number, customer_name, created_by, created_by_name, status, created_at) 
+           VALUES (%s, %s, %s, %s, 'pending', NOW())""",
+        (order_number, order.customer_name, user["user_id"], user["name"])
+    )
+    order_id = cur.lastrowid
     
     order_items = []
     for item in order.items:
-        async with db.acquire() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cur:
-                await cur.execute("SELECT * FROM products WHERE sku = %s", (item.sku,))
-                product = await cur.fetchone()
+        await cur.execute("SELECT * FROM products WHERE sku = %s", (item.sku,))
+        product = await cur.fetchone()
         
         if not product:
             raise HTTPException(status_code=400, detail=f"Product with SKU {item.sku} not found")
         
-        async with db.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    """INSERT INTO order_items (order_id, sku, product_name, full_location_code, 
-                       quantity_required, quantity_available, picking_status) 
-                       VALUES (%s, %s, %s, %s, %s, %s, 'pending')""",
-                    (order_id, item.sku, product["product_name"], product["full_location_code"],
-                     item.quantity_required, product["quantity_available"])
-                )
-                item_id = cur.lastrowid
+        await cur.execute(
+            """INSERT INTO order_items (order_id, sku, product_name, full_location_code, 
+               quantity_required, quantity_available, picking_status) 
+               VALUES (%s, %s, %s, %s, %s, %s, 'pending')""",
+            (order_id, item.sku, product["product_name"], product["full_location_code"],
+             item.quantity_required, product["quantity_available"])
+        )
+        item_id = cur.lastrowid
         
         order_items.append(OrderItemResponse(
             id=item_id, sku=item.sku, product_name=product["product_name"],
@@ -866,9 +907,49 @@ async def create_order(order: OrderCreate, user: dict = Depends(get_current_user
         created_at=datetime.now(timezone.utc).isoformat(), items=order_items
     )
 
+@orders_router.post("", response_model=OrderResponse)
+async def create_order(order: OrderCreate, user: dict = Depends(get_current_user)):
+    if order.order_id and order.order_id.strip():
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT id FROM orders WHERE order_number = %s", (order.order_id,))
+                existing = await cur.fetchone()
+        if existing:
+            raise HTTPException(status_code=400, detail=f"Order ID {order.order_id} already exists")
+        order_number = order.order_id.strip().upper()
+    else:
+        order_number = None
+    
+    try:
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                if order_number is None:
+                    order_number = f"ORD-{str(await lock_order_counter(cur)).zfill(4)}"
+                return await insert_order(cur, order, order_number, user)
+    except aiomysql.IntegrityError:
+        raise HTTPException(status_code=400, detail=f"Order ID {order_number} already exists")
+
+@orders_router.post("/bulk", response_model=List[OrderResponse])
+async def bulk_create_orders(request: OrderBulkCreate, user: dict = Depends(get_current_user)):
+    created = []
+    try:
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                next_num = await lock_order_counter(cur)
+                for order in request.orders:
+                    if order.order_id and order.order_id.strip():
+                        order_number = order.order_id.strip().upper()
+                    else:
+                        order_number = f"ORD-{str(next_num).zfill(4)}"
+                        next_num += 1
+                    created.append(await insert_order(cur, order, order_number, user))
+    except aiomysql.IntegrityError:
+        raise HTTPException(status_code=400, detail="One or more order IDs already exist")
+    
+    return created
+
 @orders_router.get("", response_model=List[OrderResponse])
 async def get_orders(status: Optional[str] = None, limit: int = 50, skip: int = 0, user: dict = Depends(get_current_user)):
-    db = await get_db()
     query = "SELECT * FROM orders WHERE 1=1"
     params = []
     
@@ -878,14 +959,14 @@ async def get_orders(status: Optional[str] = None, limit: int = 50, skip: int =
     
     query += f" ORDER BY created_at DESC LIMIT {min(limit, 200)} OFFSET {skip}"
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute(query, params)
             orders = await cur.fetchall()
     
     result = []
     for o in orders:
-        async with db.acquire() as conn:
+        async with pool.acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 await cur.execute("SELECT * FROM order_items WHERE order_id = %s", (o["id"],))
                 items = await cur.fetchall()
@@ -903,21 +984,14 @@ async def get_orders(status: Optional[str] = None, limit: int = 50, skip: int =
     
     return result
 
-@orders_router.get("/{order_id}", response_model=OrderResponse)
-async def get_order(order_id: int, user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute("SELECT * FROM orders WHERE id = %s", (order_id,))
-            o = await cur.fetchone()
-    
+async def fetch_order_response(cur, order_id: int) -> Optional[OrderResponse]:
+    await cur.execute("SELECT * FROM orders WHERE id = %s", (order_id,))
+    o = await cur.fetchone()
     if not o:
-        raise HTTPException(status_code=404, detail="Order not found")
+        return None
     
-    async with db.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute("SELECT * FROM order_items WHERE order_id = %s", (order_id,))
-            items = await cur.fetchall()
+    await cur.execute("SELECT * FROM order_items WHERE order_id = %s", (order_id,))
+    items = await cur.fetchall()
     
     return OrderResponse(
         id=o["id"], order_number=o["order_number"], customer_name=o["customer_name"],
@@ -930,10 +1004,31 @@ async def get_order(order_id: int, user: dict = Depends(get_current_user)):
         ) for i in items]
     )
 
+async def fetch_order_snapshot(order_id: int) -> dict:
+    # Returned inline by the modification endpoints so clients need no follow-up GETs
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            updated_order = await fetch_order_response(cur, order_id)
+            await cur.execute(
+                "SELECT * FROM order_modification_logs WHERE order_id = %s ORDER BY created_at DESC, id DESC LIMIT 1",
+                (order_id,)
+            )
+            last_log = await cur.fetchone()
+    return {"updated_order": updated_order, "last_log": last_log}
+
+@orders_router.get("/{order_id}", response_model=OrderResponse)
+async def get_order(order_id: int, user: dict = Depends(get_current_user)):
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            order = await fetch_order_response(cur, order_id)
+    
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
 @orders_router.patch("/{order_id}/items/{item_id}/pick")
 async def mark_item_picked(order_id: int, item_id: int, user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM order_items WHERE id = %s AND order_id = %s", (item_id, order_id))
             item = await cur.fetchone()
@@ -944,7 +1039,7 @@ async def mark_item_picked(order_id: int, item_id: int, user: dict = Depends(get
     if item["picking_status"] == "picked":
         raise HTTPException(status_code=400, detail="Item already picked")
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM products WHERE sku = %s", (item["sku"],))
             product = await cur.fetchone()
@@ -953,9 +1048,10 @@ async def mark_item_picked(order_id: int, item_id: int, user: dict = Depends(get
         new_quantity = product["quantity_available"] - item["quantity_required"]
         if new_quantity < 0:
             raise HTTPException(status_code=400, detail="Insufficient stock")
-        
-        async with db.acquire() as conn:
-            async with conn.cursor() as cur:
+    
+    async with transaction() as conn:
+        async with conn.cursor() as cur:
+            if product:
                 await cur.execute(
                     "UPDATE products SET quantity_available = %s, last_updated = NOW() WHERE sku = %s",
                     (new_quantity, item["sku"])
@@ -965,9 +1061,7 @@ async def mark_item_picked(order_id: int, item_id: int, user: dict = Depends(get
                        VALUES (%s, 'sale', %s, %s, NOW())""",
                     (item["sku"], -item["quantity_required"], user["user_id"])
                 )
-    
-    async with db.acquire() as conn:
-        async with conn.cursor() as cur:
+            
             await cur.execute("UPDATE order_items SET picking_status = 'picked' WHERE id = %s", (item_id,))
             
             await cur.execute(
@@ -983,8 +1077,7 @@ async def mark_item_picked(order_id: int, item_id: int, user: dict = Depends(get
 
 @orders_router.get("/{order_id}/modification-history")
 async def get_order_modification_history(order_id: int, user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute(
                 "SELECT * FROM order_modification_logs WHERE order_id = %s ORDER BY created_at DESC",
@@ -998,8 +1091,7 @@ async def update_order_customer(order_id: int, update: OrderUpdateCustomer, user
     if not update.customer_name or not update.customer_name.strip():
         raise HTTPException(status_code=400, detail="Customer name cannot be empty")
     
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM orders WHERE id = %s", (order_id,))
             order = await cur.fetchone()
@@ -1013,7 +1105,7 @@ async def update_order_customer(order_id: int, update: OrderUpdateCustomer, user
     old_value = order["customer_name"]
     new_value = update.customer_name.strip()
     
-    async with db.acquire() as conn:
+    async with transaction() as conn:
         async with conn.cursor() as cur:
             await cur.execute("UPDATE orders SET customer_name = %s WHERE id = %s", (new_value, order_id))
             await cur.execute(
@@ -1023,12 +1115,12 @@ async def update_order_customer(order_id: int, update: OrderUpdateCustomer, user
                 (order_id, order["order_number"], user["user_id"], user["name"], old_value, new_value, update.reason)
             )
     
-    return {"message": "Customer name updated", "old_value": old_value, "new_value": new_value}
+    return {"message": "Customer name updated", "old_value": old_value, "new_value": new_value,
+            **await fetch_order_snapshot(order_id)}
 
 @orders_router.patch("/{order_id}/status")
 async def update_order_status(order_id: int, update: OrderUpdateStatus, user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM orders WHERE id = %s", (order_id,))
             order = await cur.fetchone()
@@ -1038,7 +1130,7 @@ async def update_order_status(order_id: int, update: OrderUpdateStatus, user: di
     
     old_status = order["status"]
     
-    async with db.acquire() as conn:
+    async with transaction() as conn:
         async with conn.cursor() as cur:
             await cur.execute("UPDATE orders SET status = %s WHERE id = %s", (update.status, order_id))
             await cur.execute(
@@ -1048,12 +1140,12 @@ async def update_order_status(order_id: int, update: OrderUpdateStatus, user: di
                 (order_id, order["order_number"], user["user_id"], user["name"], old_status, update.status, update.reason)
             )
     
-    return {"message": f"Order status changed from {old_status} to {update.status}"}
+    return {"message": f"Order status changed from {old_status} to {update.status}",
+            **await fetch_order_snapshot(order_id)}
 
 @orders_router.post("/{order_id}/items")
 async def add_order_item(order_id: int, item: OrderAddItem, user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM orders WHERE id = %s", (order_id,))
             order = await cur.fetchone()
@@ -1064,7 +1156,7 @@ async def add_order_item(order_id: int, item: OrderAddItem, user: dict = Depends
     if user["role"] != "admin" and order["status"] == "completed":
         raise HTTPException(status_code=403, detail="Staff cannot edit completed orders")
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM products WHERE sku = %s", (item.sku,))
             product = await cur.fetchone()
@@ -1072,7 +1164,7 @@ async def add_order_item(order_id: int, item: OrderAddItem, user: dict = Depends
     if not product:
         raise HTTPException(status_code=400, detail=f"Product with SKU {item.sku} not found")
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT id FROM order_items WHERE order_id = %s AND sku = %s", (order_id, item.sku))
             existing = await cur.fetchone()
@@ -1080,7 +1172,7 @@ async def add_order_item(order_id: int, item: OrderAddItem, user: dict = Depends
     if existing:
         raise HTTPException(status_code=400, detail=f"Item {item.sku} already exists. Use quantity update instead.")
     
-    async with db.acquire() as conn:
+    async with transaction() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
                 """INSERT INTO order_items (order_id, sku, product_name, full_location_code, 
@@ -1099,12 +1191,11 @@ async def add_order_item(order_id: int, item: OrderAddItem, user: dict = Depends
                  f"{item.sku} x{item.quantity_required}", item.reason)
             )
     
-    return {"message": f"Item {item.sku} added", "item_id": item_id}
+    return {"message": f"Item {item.sku} added", "item_id": item_id, **await fetch_order_snapshot(order_id)}
 
 @orders_router.delete("/{order_id}/items/{item_id}")
 async def remove_order_item(order_id: int, item_id: int, reason: Optional[str] = None, user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM orders WHERE id = %s", (order_id,))
             order = await cur.fetchone()
@@ -1115,7 +1206,7 @@ async def remove_order_item(order_id: int, item_id: int, reason: Optional[str] =
     if user["role"] != "admin" and order["status"] == "completed":
         raise HTTPException(status_code=403, detail="Staff cannot edit completed orders")
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM order_items WHERE id = %s AND order_id = %s", (item_id, order_id))
             item = await cur.fetchone()
@@ -1124,9 +1215,9 @@ async def remove_order_item(order_id: int, item_id: int, reason: Optional[str] =
         raise HTTPException(status_code=404, detail="Item not found")
     
     stock_restored = 0
-    if item["picking_status"] == "picked":
-        async with db.acquire() as conn:
-            async with conn.cursor() as cur:
+    async with transaction() as conn:
+        async with conn.cursor() as cur:
+            if item["picking_status"] == "picked":
                 await cur.execute(
                     "UPDATE products SET quantity_available = quantity_available + %s, last_updated = NOW() WHERE sku = %s",
                     (item["quantity_required"], item["sku"])
@@ -1136,10 +1227,8 @@ async def remove_order_item(order_id: int, item_id: int, reason: Optional[str] =
                        VALUES (%s, 'reversal_remove_item', %s, %s, NOW())""",
                     (item["sku"], item["quantity_required"], user["user_id"])
                 )
-        stock_restored = item["quantity_required"]
-    
-    async with db.acquire() as conn:
-        async with conn.cursor() as cur:
+                stock_restored = item["quantity_required"]
+            
             await cur.execute("DELETE FROM order_items WHERE id = %s", (item_id,))
             await cur.execute(
                 """INSERT INTO order_modification_logs (order_id, order_number, modified_by, modified_by_name,
@@ -1149,12 +1238,12 @@ async def remove_order_item(order_id: int, item_id: int, reason: Optional[str] =
                  f"{item['sku']} x{item['quantity_required']}", reason)
             )
     
-    return {"message": f"Item {item['sku']} removed", "stock_restored": stock_restored}
+    return {"message": f"Item {item['sku']} removed", "stock_restored": stock_restored,
+            **await fetch_order_snapshot(order_id)}
 
 @orders_router.patch("/{order_id}/items/{item_id}/quantity")
 async def update_item_quantity(order_id: int, item_id: int, update: OrderUpdateItemQty, user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM orders WHERE id = %s", (order_id,))
             order = await cur.fetchone()
@@ -1165,7 +1254,7 @@ async def update_item_quantity(order_id: int, item_id: int, update: OrderUpdateI
     if user["role"] != "admin" and order["status"] == "completed":
         raise HTTPException(status_code=403, detail="Staff cannot edit completed orders")
     
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM order_items WHERE id = %s AND order_id = %s", (item_id, order_id))
             item = await cur.fetchone()
@@ -1179,7 +1268,7 @@ async def update_item_quantity(order_id: int, item_id: int, update: OrderUpdateI
     stock_adjusted = 0
     
     if item["picking_status"] == "picked":
-        async with db.acquire() as conn:
+        async with pool.acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 await cur.execute("SELECT quantity_available FROM products WHERE sku = %s", (item["sku"],))
                 product = await cur.fetchone()
@@ -1188,22 +1277,21 @@ async def update_item_quantity(order_id: int, item_id: int, update: OrderUpdateI
             adjusted_quantity = product["quantity_available"] - qty_diff
             if adjusted_quantity < 0:
                 raise HTTPException(status_code=400, detail="Insufficient stock for quantity increase")
-            
-            async with db.acquire() as conn:
-                async with conn.cursor() as cur:
-                    await cur.execute(
-                        "UPDATE products SET quantity_available = %s, last_updated = NOW() WHERE sku = %s",
-                        (adjusted_quantity, item["sku"])
-                    )
-                    await cur.execute(
-                        """INSERT INTO stock_transactions (sku, change_type, quantity_changed, performed_by, created_at) 
-                           VALUES (%s, 'qty_adjustment', %s, %s, NOW())""",
-                        (item["sku"], -qty_diff, user["user_id"])
-                    )
             stock_adjusted = qty_diff
     
-    async with db.acquire() as conn:
+    async with transaction() as conn:
         async with conn.cursor() as cur:
+            if stock_adjusted:
+                await cur.execute(
+                    "UPDATE products SET quantity_available = %s, last_updated = NOW() WHERE sku = %s",
+                    (adjusted_quantity, item["sku"])
+                )
+                await cur.execute(
+                    """INSERT INTO stock_transactions (sku, change_type, quantity_changed, performed_by, created_at) 
+                       VALUES (%s, 'qty_adjustment', %s, %s, NOW())""",
+                    (item["sku"], -qty_diff, user["user_id"])
+                )
+            
             await cur.execute("UPDATE order_items SET quantity_required = %s WHERE id = %s", (new_qty, item_id))
             await cur.execute(
                 """INSERT INTO order_modification_logs (order_id, order_number, modified_by, modified_by_name,
@@ -1213,12 +1301,51 @@ async def update_item_quantity(order_id: int, item_id: int, update: OrderUpdateI
                  f"quantity ({item['sku']})", str(old_qty), str(new_qty), update.reason)
             )
     
-    return {"message": f"Quantity updated from {old_qty} to {new_qty}", "stock_adjusted": stock_adjusted}
+    return {"message": f"Quantity updated from {old_qty} to {new_qty}", "stock_adjusted": stock_adjusted,
+            **await fetch_order_snapshot(order_id)}
+
+async def delete_order_rows(cur, order: dict, user: dict, reason: Optional[str]):
+    # Runs inside the caller's transaction with a DictCursor
+    await cur.execute("SELECT * FROM order_items WHERE order_id = %s", (order["id"],))
+    items = await cur.fetchall()
+    
+    for item in items:
+        if item["picking_status"] == "picked":
+            await cur.execute(
+                "UPDATE products SET quantity_available = quantity_available + %s, last_updated = NOW() WHERE sku = %s",
+                (item["quantity_required"], item["sku"])
+            )
+            await cur.execute(
+                """INSERT INTO stock_transactions (sku, change_type, quantity_changed, performed_by, created_at) 
+                   VALUES (%s, 'reversal_order_delete', %s, %s, NOW())""",
+                (item["sku"], item["quantity_required"], user["user_id"])
+            )
+    
+    await cur.execute(
+        """INSERT INTO order_modification_logs (order_id, order_number, modified_by, modified_by_name,
+           modification_type, field_changed, old_value, new_value, reason, created_at)
+           VALUES (%s, %s, %s, %s, 'delete_order', 'order', %s, 'DELETED', %s, NOW())""",
+        (order["id"], order["order_number"], user["user_id"], user["name"],
+         f"Order {order['order_number']} with {len(items)} items", reason)
+    )
+    await cur.execute("DELETE FROM order_items WHERE order_id = %s", (order["id"],))
+    await cur.execute("DELETE FROM orders WHERE id = %s", (order["id"],))
+
+@orders_router.post("/bulk-delete")
+async def bulk_delete_orders(request: OrderBulkDelete, user: dict = Depends(require_admin)):
+    placeholders = ", ".join(["%s"] * len(request.ids))
+    async with transaction() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(f"SELECT * FROM orders WHERE id IN ({placeholders})", request.ids)
+            orders = await cur.fetchall()
+            for order in orders:
+                await delete_order_rows(cur, order, user, request.reason)
+    
+    return {"message": f"{len(orders)} orders deleted", "order_numbers": [o["order_number"] for o in orders]}
 
 @orders_router.delete("/{order_id}")
 async def delete_order(order_id: int, reason: Optional[str] = None, user: dict = Depends(require_admin)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM orders WHERE id = %s", (order_id,))
             order = await cur.fetchone()
@@ -1226,36 +1353,9 @@ async def delete_order(order_id: int, reason: Optional[str] = None, user: dict =
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    async with db.acquire() as conn:
+    async with transaction() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute("SELECT * FROM order_items WHERE order_id = %s", (order_id,))
-            items = await cur.fetchall()
-    
-    for item in items:
-        if item["picking_status"] == "picked":
-            async with db.acquire() as conn:
-                async with conn.cursor() as cur:
-                    await cur.execute(
-                        "UPDATE products SET quantity_available = quantity_available + %s, last_updated = NOW() WHERE sku = %s",
-                        (item["quantity_required"], item["sku"])
-                    )
-                    await cur.execute(
-                        """INSERT INTO stock_transactions (sku, change_type, quantity_changed, performed_by, created_at) 
-                           VALUES (%s, 'reversal_order_delete', %s, %s, NOW())""",
-                        (item["sku"], item["quantity_required"], user["user_id"])
-                    )
-    
-    async with db.acquire() as conn:
-        async with conn.cursor() as cur:
-            await cur.execute(
-                """INSERT INTO order_modification_logs (order_id, order_number, modified_by, modified_by_name,
-                   modification_type, field_changed, old_value, new_value, reason, created_at)
-                   VALUES (%s, %s, %s, %s, 'delete_order', 'order', %s, 'DELETED', %s, NOW())""",
-                (order_id, order["order_number"], user["user_id"], user["name"],
-                 f"Order {order['order_number']} with {len(items)} items", reason)
-            )
-            await cur.execute("DELETE FROM order_items WHERE order_id = %s", (order_id,))
-            await cur.execute("DELETE FROM orders WHERE id = %s", (order_id,))
+            await delete_order_rows(cur, order, user, reason)
     
     return {"message": "Order deleted", "order_number": order["order_number"]}
 
@@ -1263,8 +1363,7 @@ async def delete_order(order_id: int, reason: Optional[str] = None, user: dict =
 
 @dashboard_router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             await cur.execute("SELECT COUNT(*) FROM products")
             total_products = (await cur.fetchone())[0]
@@ -1291,19 +1390,17 @@ async def get_dashboard_stats(user: dict = Depends(get_current_user)):
 
 @dashboard_router.get("/zone-distribution")
 async def get_zone_distribution(user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute(
-                "SELECT zone, COUNT(*) as count, SUM(quantity_available) as stock FROM products GROUP BY zone"
+                "SELECT zone, COUNT(*) as count, CAST(SUM(quantity_available) AS SIGNED) as stock FROM products GROUP BY zone"
             )
             result = await cur.fetchall()
     return [dict(r) for r in result]
 
 @dashboard_router.get("/category-distribution")
 async def get_category_distribution(user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute(
                 "SELECT category, COUNT(*) as count FROM products GROUP BY category ORDER BY count DESC LIMIT 10"
@@ -1313,8 +1410,7 @@ async def get_category_distribution(user: dict = Depends(get_current_user)):
 
 @dashboard_router.get("/recent-transactions")
 async def get_recent_transactions(user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM stock_transactions ORDER BY created_at DESC LIMIT 20")
             transactions = await cur.fetchall()
@@ -1322,8 +1418,7 @@ async def get_recent_transactions(user: dict = Depends(get_current_user)):
 
 @dashboard_router.get("/low-stock-items")
 async def get_low_stock_items(user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute(
                 """SELECT sku, product_name, quantity_available, reorder_level, full_location_code 
@@ -1334,8 +1429,7 @@ async def get_low_stock_items(user: dict = Depends(get_current_user)):
 
 @dashboard_router.get("/staff-presence")
 async def get_staff_presence(user: dict = Depends(get_current_user)):
-    db = await get_db()
-    async with db.acquire() as conn:
+    async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM employees")
             employees = await cur.fetchall()
@@ -1344,7 +1438,7 @@ async def get_staff_presence(user: dict = Depends(get_current_user)):
     for emp in employees:
         presence_updated_by_name = None
         if emp.get("presence_updated_by"):
-            async with db.acquire() as conn:
+            async with pool.acquire() as conn:
                 async with conn.cursor(aiomysql.DictCursor) as cur:
                     await cur.execute("SELECT name FROM employees WHERE id = %s", (emp["presence_updated_by"],))
                     updater = await cur.fetchone()
@@ -1363,43 +1457,86 @@ async def get_staff_presence(user: dict = Depends(get_current_user)):
 
 # ==================== PUBLIC ROUTES (NO AUTH) ====================
 
+# Columns a public catalogue request may narrow to with ?fields=
+CATALOGUE_FIELDS = frozenset(PublicProduct.model_fields)
+CATALOGUE_COLUMNS = ", ".join(PublicProduct.model_fields)
+
+# Catalogue SQL for each (has_search, has_category) combination, built once at import
+CATALOGUE_QUERIES = {
+    (has_search, has_category): (
+        "SELECT {columns} FROM products WHERE 1=1"
+        + (" AND (sku LIKE %s OR product_name LIKE %s)" if has_search else "")
+        + (" AND category = %s" if has_category else "")
+        + " ORDER BY product_name LIMIT %s OFFSET %s"
+    )
+    for has_search in (False, True)
+    for has_category in (False, True)
+}
+
 @public_router.get("/catalogue", response_model=List[PublicProduct])
-async def get_public_catalogue(search: Optional[str] = None, category: Optional[str] = None, limit: int = 50, skip: int = 0):
-    db = await get_db()
-    query = "SELECT sku, product_name, category, brand, image_url, selling_price, mrp, unit FROM products WHERE 1=1"
-    params = []
-    
-    if search:
-        query += " AND (sku LIKE %s OR product_name LIKE %s)"
-        search_param = f"%{search}%"
-        params.extend([search_param, search_param])
-    
-    if category:
-        query += " AND category = %s"
-        params.append(category)
-    
-    query += f" ORDER BY product_name LIMIT {min(limit, 100)} OFFSET {skip}"
-    
-    async with db.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute(query, params)
-            products = await cur.fetchall()
-    
-    return [PublicProduct(
-        sku=p["sku"], product_name=p["product_name"], category=p["category"],
-        brand=p["brand"] or "", image_url=p["image_url"] or "",
-        selling_price=float(p["selling_price"] or 0), mrp=float(p["mrp"] or 0),
-        unit=p["unit"] or "piece"
-    ) for p in products]
+async def get_public_catalogue(search: Optional[str] = None, category: Optional[str] = None, limit: int = 50, skip: int = 0,
+                               fields: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
+    columns = CATALOGUE_COLUMNS
+    if fields:
+        requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        if not requested:
+            raise HTTPException(status_code=400, detail="fields must name at least one column")
+        unknown = set(requested) - CATALOGUE_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        columns = ", ".join(requested)
+    
+    limit = min(limit, 100)
+    key = (search or "", category or "", limit, skip, columns)
+    cached = _catalogue_cache.get(key)
+    if cached is not None and time.monotonic() < cached[0]:
+        _, body, etag = cached
+    else:
+        query = CATALOGUE_QUERIES[(bool(search), bool(category))].format(columns=columns)
+        params = []
+        
+        if search:
+            search_param = f"%{search}%"
+            params.extend([search_param, search_param])
+        
+        if category:
+            params.append(category)
+        
+        params.extend([limit, skip])
+        
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                await cur.execute(query, params)
+                products = await cur.fetchall()
+        
+        # Rows already match PublicProduct (or the requested subset of it). The ETag is weak
+        # because GZipMiddleware may send the same page under another content-coding.
+        body = orjson.dumps(products)
+        etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        if key not in _catalogue_cache and len(_catalogue_cache) >= CATALOGUE_CACHE_MAX_ENTRIES:
+            del _catalogue_cache[next(iter(_catalogue_cache))]
+        _catalogue_cache[key] = (time.monotonic() + CATALOGUE_CACHE_TTL, body, etag)
+    
+    # Repeat readers get a bodiless 304 without the page being queried or encoded again
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 @public_router.get("/categories")
 async def get_public_categories():
-    db = await get_db()
-    async with db.acquire() as conn:
+    body = _categories_cache["body"]
+    if body is not None and time.monotonic() < _categories_cache["expires"]:
+        return Response(content=body, media_type="application/json")
+    
+    async with pool.acquire() as conn:
         async with conn.cursor() as cur:
-            await cur.execute("SELECT DISTINCT category FROM products ORDER BY category")
+            await cur.execute("SELECT name FROM categories ORDER BY name")
             categories = await cur.fetchall()
-    return [c[0] for c in categories if c[0]]
+    
+    body = orjson.dumps([c[0] for c in categories])
+    _categories_cache["body"] = body
+    _categories_cache["expires"] = time.monotonic() + CATEGORIES_CACHE_TTL
+    return Response(content=body, media_type="application/json")
 
 # ==================== ROOT & HEALTH ====================
 
@@ -1417,23 +1554,22 @@ async def health():
 async def startup_db():
     global pool
     try:
-        pool = await aiomysql.create_pool(**MYSQL_CONFIG)
+        pool = await aiomysql.create_pool(minsize=DB_POOL_SIZE, maxsize=DB_POOL_SIZE, conv=MYSQL_CONVERSIONS, **MYSQL_CONFIG)
         logging.info("MySQL connection pool created")
         
+        # Seed check and seed insert share one connection and cursor
         async with pool.acquire() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cur:
-                await cur.execute("SELECT * FROM employees WHERE email = 'admin@sellandiamman.com'")
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT 1 FROM employees WHERE email = %s LIMIT 1", ('admin@sellandiamman.com',))
                 admin = await cur.fetchone()
-        
-        if not admin:
-            async with pool.acquire() as conn:
-                async with conn.cursor() as cur:
+
+                if not admin:
                     await cur.execute(
-                        """INSERT INTO employees (name, email, role, status, password_hash, presence_status, created_at) 
+                        """INSERT INTO employees (name, email, role, status, password_hash, presence_status, created_at)
                            VALUES ('Admin', 'admin@sellandiamman.com', 'admin', 'active', %s, 'present', NOW())""",
-                        (hash_password("admin123"),)
+                        (await hash_password("admin123"),)
                     )
-            logging.info("Default admin created: admin@sellandiamman.com / admin123")
+                    logging.info("Default admin created: admin@sellandiamman.com / admin123")
         
     except Exception as e:
         logging.error(f"Database connection failed: {e}")
@@ -1446,6 +1582,18 @@ async def shutdown_db():
         pool.close()
         await pool.wait_closed()
 
+# CORS is registered before the routers
+app.add_middleware(
+    CORSMiddleware,
+    allow_credentials=True,
+    allow_origins=ALLOWED_ORIGINS,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Compress JSON bodies (catalogue and product lists) for clients that send Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Include all routers
 app.include_router(api_router)
 app.include_router(auth_router)
@@ -1455,19 +1603,6 @@ app.include_router(orders_router)
 app.include_router(dashboard_router)
 app.include_router(public_router)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=[
-        "https://www.sellandiammantraders.com",
-        "https://sellandiammantraders.com",
-        "http://localhost:3000",
-        os.environ.get('CORS_ORIGINS', '*')
-    ],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
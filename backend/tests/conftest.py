@@ -0,0 +1,3 @@
+def pytest_configure(config):
+    config.addinivalue_line("markers", "integration: talks to the live backend at REACT_APP_BACKEND_URL")
+    config.addinivalue_line("markers", "contract: runs the in-process app against a stubbed database, no network")
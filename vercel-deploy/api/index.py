@@ -1,20 +1,23 @@
-from http.server import BaseHTTPRequestHandler
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import base64
+import gzip
+import hashlib
+import hmac
 import json
 import os
+import queue
+import re
 import sys
+import threading
+import time
 import traceback
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
 
 # Debug: Print Python version and environment info
 print(f"Python version: {sys.version}", flush=True)
 print(f"Starting Sellandiamman API...", flush=True)
 
-try:
-    import jwt
-    print("jwt imported successfully", flush=True)
-except ImportError as e:
-    print(f"Error importing jwt: {e}", flush=True)
-    jwt = None
-
 try:
     import bcrypt
     print("bcrypt imported successfully", flush=True)
@@ -24,13 +27,22 @@ except ImportError as e:
 
 try:
     import pymysql
+    import pymysql.converters
     import pymysql.cursors
     print("pymysql imported successfully", flush=True)
 except ImportError as e:
     print(f"Error importing pymysql: {e}", flush=True)
     pymysql = None
 
-from datetime import datetime, timezone
+try:
+    import orjson
+    print("orjson imported successfully", flush=True)
+except ImportError as e:
+    print(f"Error importing orjson: {e}", flush=True)
+    orjson = None
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
 from urllib.parse import parse_qs, urlparse
 
 # MySQL Configuration
@@ -49,25 +61,84 @@ MYSQL_CONFIG = {
     'password': MYSQL_PASSWORD,
     'db': MYSQL_DATABASE,
     'charset': 'utf8mb4',
-    'cursorclass': pymysql.cursors.DictCursor if pymysql else None
+    'cursorclass': pymysql.cursors.Cursor if pymysql else None,
+    # Prices are only ever sent as JSON numbers, so DECIMAL columns arrive as floats
+    # and orjson serializes them natively instead of calling back into _json_default
+    'conv': {
+        **pymysql.converters.conversions,
+        pymysql.constants.FIELD_TYPE.DECIMAL: float,
+        pymysql.constants.FIELD_TYPE.NEWDECIMAL: float
+    } if pymysql else None
 }
 
 JWT_SECRET = os.environ.get('JWT_SECRET', 'sellandiamman-secret-2024')
 JWT_ALGORITHM = "HS256"
 
+# Idle connections kept at module level so warm invocations skip the MySQL handshake
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '10'))
+# Connections returned more recently than this are reused without a ping round-trip
+DB_PING_AFTER = float(os.environ.get('DB_PING_AFTER', '30'))
+_POOL = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
 def get_db():
     if not pymysql:
         raise Exception("pymysql not available")
     if not MYSQL_HOST or not MYSQL_USER or not MYSQL_DATABASE:
         raise Exception(f"Missing MySQL config: HOST={bool(MYSQL_HOST)}, USER={bool(MYSQL_USER)}, DB={bool(MYSQL_DATABASE)}")
-    return pymysql.connect(**MYSQL_CONFIG)
+    try:
+        conn, released_at = _POOL.get_nowait()
+    except queue.Empty:
+        return pymysql.connect(**MYSQL_CONFIG)
+    if time.monotonic() - released_at > DB_PING_AFTER:
+        conn.ping(reconnect=True)
+    return conn
+
+def release_db(conn):
+    try:
+        # End any open transaction so the next request doesn't read a stale snapshot
+        conn.rollback()
+    except Exception:
+        # A connection that cannot roll back is not reused, but its socket still closes
+        try:
+            conn.close()
+        except Exception:
+            pass
+        return
+    try:
+        _POOL.put_nowait((conn, time.monotonic()))
+    except queue.Full:
+        conn.close()
+
+# bcrypt releases the GIL while hashing, so concurrent request threads already overlap
+BCRYPT_COST = int(os.environ.get('BCRYPT_COST', '12'))
 
 def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(BCRYPT_COST)).decode('utf-8')
 
 def verify_password(password, hashed):
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+# Checked against when the email is unknown, so that path costs the same bcrypt
+# round as a real account. Built at import so no login pays for the extra hashpw.
+_DUMMY_HASH = hash_password("dummy-password") if bcrypt else None
+
+def verify_dummy_password(password):
+    verify_password(password, _DUMMY_HASH)
+    return False
+
+# HS256 JWTs signed directly with hmac; the key and header segment are prepared once
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+def _b64url_decode(data):
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+_JWT_KEY = JWT_SECRET.encode('utf-8')
+_JWT_HEADER = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+
+def _jwt_signature(signing_input):
+    return _b64url(hmac.new(_JWT_KEY, signing_input, hashlib.sha256).digest())
+
 def create_token(user_id, email, role, name):
     payload = {
         "user_id": user_id,
@@ -76,13 +147,139 @@ def create_token(user_id, email, role, name):
         "name": name,
         "exp": datetime.now(timezone.utc).timestamp() + 86400
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    signing_input = _JWT_HEADER + b'.' + _b64url(encode_json(payload))
+    return (signing_input + b'.' + _jwt_signature(signing_input)).decode('ascii')
+
+def decode_token(token):
+    header, payload, signature = token.encode('ascii').split(b'.')
+    if json.loads(_b64url_decode(header)).get("alg") != JWT_ALGORITHM:
+        raise ValueError("Unexpected token algorithm")
+    if not hmac.compare_digest(_jwt_signature(header + b'.' + payload), signature):
+        raise ValueError("Invalid token signature")
+    claims = json.loads(_b64url_decode(payload))
+    if "exp" in claims and claims["exp"] <= time.time():
+        raise ValueError("Token expired")
+    return claims
+
+# Recently verified tokens, keyed by digest so raw tokens are never held in memory
+TOKEN_CACHE_MAX = 10_000
+TOKEN_CACHE_TTL = 5
+_TOKEN_CACHE = OrderedDict()
+# The standalone server runs handlers on threads that share the module caches
+_TOKEN_CACHE_LOCK = threading.Lock()
 
 def verify_token(token):
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    now = time.monotonic()
+    cached = _TOKEN_CACHE.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+    
     try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = decode_token(token)
     except:
+        with _TOKEN_CACHE_LOCK:
+            _TOKEN_CACHE.pop(key, None)
         return None
+    
+    # Never serve a token from cache past its own exp claim
+    expiry = min(now + TOKEN_CACHE_TTL, now + payload.get("exp", 0) - time.time())
+    with _TOKEN_CACHE_LOCK:
+        _TOKEN_CACHE[key] = (payload, expiry)
+        _TOKEN_CACHE.move_to_end(key)
+        if len(_TOKEN_CACHE) > TOKEN_CACHE_MAX:
+            _TOKEN_CACHE.popitem(last=False)
+    return payload
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def encode_json(data):
+    if orjson:
+        return orjson.dumps(data, default=_json_default)
+    return json.dumps(data, default=_json_default).encode()
+
+# Encoded bodies for product-derived GET responses, one per "<kind>:" key. The list
+# queries take no parameters, so the query string stays out of the key and
+# cache-busting requests cannot add entries.
+RESPONSE_CACHE_TTL = 30
+# Category and zone lists barely change and every product write clears them anyway
+LOOKUP_CACHE_TTL = 60
+_RESP_CACHE = {}
+# Guards writes to _RESP_CACHE and its entries; a single dict get needs no lock
+_RESP_CACHE_LOCK = threading.Lock()
+
+def cached_response(key):
+    entry = _RESP_CACHE.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def cached_etag(key, payload):
+    # Hashed on first use and kept beside the body it was computed from
+    entry = _RESP_CACHE.get(key)
+    if entry and entry[1] is payload and entry[2]:
+        return entry[2]
+    etag = f'"{hashlib.blake2b(payload, digest_size=16).hexdigest()}"'
+    if entry and entry[1] is payload:
+        with _RESP_CACHE_LOCK:
+            entry[2] = etag
+    return etag
+
+def cached_gzip(key, payload):
+    # Compressed once per cache fill, then served as-is to every gzip-capable client
+    entry = _RESP_CACHE.get(key)
+    if entry and entry[1] is payload and entry[3]:
+        return entry[3]
+    compressed = gzip.compress(payload, compresslevel=6)
+    if entry and entry[1] is payload:
+        with _RESP_CACHE_LOCK:
+            entry[3] = compressed
+    return compressed
+
+def store_response(key, data, ttl=RESPONSE_CACHE_TTL):
+    payload = encode_json(data)
+    with _RESP_CACHE_LOCK:
+        _RESP_CACHE[key] = [time.monotonic() + ttl, payload, None, None]
+    return payload
+
+def invalidate_product_cache():
+    with _RESP_CACHE_LOCK:
+        for key in [k for k in _RESP_CACHE if k.startswith(("products:", "catalogue:", "categories:", "zones:"))]:
+            del _RESP_CACHE[key]
+
+def etag_matches(if_none_match, etag):
+    # If-None-Match is a list of entity tags compared weakly (RFC 9110 13.1.2)
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix('W/')
+    tags = (tag.strip() for tag in if_none_match.split(','))
+    return any(tag == '*' or tag.removeprefix('W/') == opaque for tag in tags)
+
+def accepts_gzip(accept_encoding):
+    # Honour q-values, so "gzip;q=0" (or "*;q=0" with no gzip entry) refuses gzip
+    default = 0.0
+    for coding in (accept_encoding or '').split(','):
+        name, _, params = coding.partition(';')
+        name = name.strip().lower()
+        if name not in ('gzip', '*'):
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name == 'gzip':
+            return q > 0
+        default = q
+    return default > 0
 
 def generate_location_code(zone, aisle, rack, shelf, bin):
     return f"{zone}-{str(aisle).zfill(2)}-R{str(rack).zfill(2)}-S{shelf}-B{str(bin).zfill(2)}"
@@ -95,11 +292,83 @@ def cors_headers():
         'Content-Type': 'application/json'
     }
 
+PRODUCT_LIST_FIELDS = (
+    "id", "sku", "product_name", "category", "brand", "zone", "aisle", "rack", "shelf", "bin",
+    "full_location_code", "quantity_available", "reorder_level", "supplier", "image_url",
+    "selling_price", "mrp", "unit", "gst_percentage", "last_updated"
+)
+
+PRODUCT_SELECT = """
+    SELECT id, sku, product_name, category, IFNULL(brand, ''), zone, aisle, rack, shelf, bin,
+    full_location_code, quantity_available, reorder_level, IFNULL(supplier, ''), IFNULL(image_url, ''),
+    IFNULL(selling_price, 0), IFNULL(mrp, 0), COALESCE(NULLIF(unit, ''), 'piece'),
+    IFNULL(gst_percentage, 18), last_updated
+    FROM products
+"""
+
+PRODUCT_LIST_SQL = PRODUCT_SELECT + " ORDER BY product_name LIMIT 500"
+PRODUCT_BY_ID_SQL = PRODUCT_SELECT + " WHERE id = %s"
+
+# Public catalogue rows, with the same NULL defaults applied by the DB
+CATALOGUE_FIELDS = ("sku", "product_name", "category", "brand", "image_url", "selling_price", "mrp", "unit")
+
+CATALOGUE_SQL = """
+    SELECT sku, product_name, category, IFNULL(brand, ''), IFNULL(image_url, ''),
+    IFNULL(selling_price, 0), IFNULL(mrp, 0), COALESCE(NULLIF(unit, ''), 'piece')
+    FROM products ORDER BY product_name LIMIT 100
+"""
+
+# Routing tables, built once at import. Exact paths are a dict lookup; '*' matches
+# any method. Parameterised paths fall through to the precompiled patterns.
+ROUTES_EXACT = {
+    ('*', '/api/health'): lambda h, query: h.handle_health(),
+    ('*', '/api'): lambda h, query: h.handle_root(),
+    ('POST', '/api/auth/login'): lambda h, query: h.handle_login(),
+    ('GET', '/api/auth/me'): lambda h, query: h.handle_get_me(),
+    ('GET', '/api/products'): lambda h, query: h.handle_get_products(),
+    ('POST', '/api/products'): lambda h, query: h.handle_create_product(),
+    ('GET', '/api/products/categories'): lambda h, query: h.handle_get_categories(),
+    ('GET', '/api/products/zones'): lambda h, query: h.handle_get_zones(),
+    ('GET', '/api/employees'): lambda h, query: h.handle_get_employees(),
+    ('POST', '/api/employees'): lambda h, query: h.handle_create_employee(),
+    ('GET', '/api/orders'): lambda h, query: h.handle_get_orders(query),
+    ('POST', '/api/orders'): lambda h, query: h.handle_create_order(),
+    ('GET', '/api/orders/next-order-id'): lambda h, query: h.handle_next_order_id(),
+    ('GET', '/api/dashboard/stats'): lambda h, query: h.handle_dashboard_stats(),
+    ('GET', '/api/dashboard/staff-presence'): lambda h, query: h.handle_staff_presence(),
+    ('GET', '/api/public/catalogue'): lambda h, query: h.handle_public_catalogue(),
+    ('GET', '/api/public/categories'): lambda h, query: h.handle_public_categories(),
+    ('GET', '/api/public/bootstrap'): lambda h, query: h.handle_public_bootstrap(),
+}
+
+# Keyed by method so a request only tries the patterns that could match it
+PRODUCT_ID_PATH = re.compile(r'^/api/products/(?P<product_id>[^/]+)$')
+ORDER_ID_PATH = re.compile(r'^/api/orders/(?P<order_id>[^/]+)$')
+
+ROUTES_RE = {
+    'GET': ((PRODUCT_ID_PATH, 'handle_get_product'), (ORDER_ID_PATH, 'handle_get_order')),
+    'PUT': ((PRODUCT_ID_PATH, 'handle_update_product'),),
+    'DELETE': ((PRODUCT_ID_PATH, 'handle_delete_product'),),
+}
+
+ORDER_FIELDS = ("id", "order_number", "customer_name", "created_by", "created_by_name", "status", "created_at")
+ORDER_COLUMNS = ", ".join(ORDER_FIELDS)
+
+# order_id leads so rows can be bucketed by order before projecting the rest
+ORDER_ITEM_FIELDS = (
+    "id", "sku", "product_name", "full_location_code", "quantity_required", "quantity_available", "picking_status"
+)
+ORDER_ITEM_COLUMNS = "order_id, " + ", ".join(ORDER_ITEM_FIELDS)
+
 class handler(BaseHTTPRequestHandler):
+    # Every response carries a Content-Length, so connections can be kept alive
+    protocol_version = "HTTP/1.1"
+    
     def do_OPTIONS(self):
         self.send_response(200)
         for key, value in cors_headers().items():
             self.send_header(key, value)
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def do_GET(self):
@@ -118,16 +387,34 @@ class handler(BaseHTTPRequestHandler):
         self.handle_request('PATCH')
     
     def send_json(self, status, data):
+        self.send_cached_bytes(status, encode_json(data))
+    
+    def send_cached_bytes(self, status, payload, headers=None):
         self.send_response(status)
         for key, value in cors_headers().items():
             self.send_header(key, value)
+        if headers:
+            for key, value in headers.items():
+                self.send_header(key, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('Connection', 'keep-alive')
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def send_not_modified(self, headers):
+        # A 304 carries the validators but no body, so no Content-Length or Content-Type
+        self.send_response(304)
+        for key, value in cors_headers().items():
+            if key != 'Content-Type':
+                self.send_header(key, value)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Connection', 'keep-alive')
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
     
     def get_body(self):
-        content_length = int(self.headers.get('Content-Length', 0))
-        if content_length:
-            return json.loads(self.rfile.read(content_length))
+        if self.raw_body:
+            return orjson.loads(self.raw_body) if orjson else json.loads(self.raw_body)
         return {}
     
     def get_user(self):
@@ -136,113 +423,38 @@ class handler(BaseHTTPRequestHandler):
             return verify_token(auth[7:])
         return None
     
+    @contextmanager
+    def db_cursor(self, cursorclass=None):
+        # One pooled connection and one cursor for the whole request
+        conn = get_db()
+        cur = conn.cursor(cursorclass)
+        try:
+            yield conn, cur
+        finally:
+            cur.close()
+            release_db(conn)
+    
     def handle_request(self, method):
-        path = urlparse(self.path).path
-        query = parse_qs(urlparse(self.path).query)
+        url = urlparse(self.path)
+        path = url.path
+        query = parse_qs(url.query) if url.query else {}
+        
+        # Always consume the body, even when a handler rejects the request early,
+        # so it isn't read as the next request on a kept-alive connection
+        content_length = int(self.headers.get('Content-Length', 0))
+        self.raw_body = self.rfile.read(content_length) if content_length else b''
         
         print(f"Handling {method} request for {path}", flush=True)
         
         try:
-            # Health check
-            if path == '/api/health':
-                # Test database connection
-                db_status = "unknown"
-                db_error = None
-                try:
-                    if pymysql and MYSQL_HOST:
-                        conn = get_db()
-                        conn.close()
-                        db_status = "connected"
-                    else:
-                        db_status = "not_configured"
-                except Exception as db_e:
-                    db_status = "error"
-                    db_error = str(db_e)
-                
-                return self.send_json(200, {
-                    "status": "healthy",
-                    "database": db_status,
-                    "db_error": db_error,
-                    "python_version": sys.version,
-                    "modules": {
-                        "jwt": jwt is not None,
-                        "bcrypt": bcrypt is not None,
-                        "pymysql": pymysql is not None
-                    },
-                    "env_configured": {
-                        "MYSQL_HOST": bool(MYSQL_HOST),
-                        "MYSQL_USER": bool(MYSQL_USER),
-                        "MYSQL_DATABASE": bool(MYSQL_DATABASE)
-                    }
-                })
-            
-            if path == '/api':
-                return self.send_json(200, {"message": "Sellandiamman Traders API", "status": "running"})
-            
-            # Auth routes
-            if path == '/api/auth/login' and method == 'POST':
-                return self.handle_login()
-            
-            if path == '/api/auth/me' and method == 'GET':
-                return self.handle_get_me()
-            
-            # Products routes
-            if path == '/api/products' and method == 'GET':
-                return self.handle_get_products(query)
-            
-            if path == '/api/products' and method == 'POST':
-                return self.handle_create_product()
-            
-            if path.startswith('/api/products/') and method == 'GET':
-                product_id = path.split('/')[-1]
-                if product_id == 'categories':
-                    return self.handle_get_categories()
-                if product_id == 'zones':
-                    return self.handle_get_zones()
-                return self.handle_get_product(product_id)
-            
-            if path.startswith('/api/products/') and method == 'PUT':
-                product_id = path.split('/')[-1]
-                return self.handle_update_product(product_id)
-            
-            if path.startswith('/api/products/') and method == 'DELETE':
-                product_id = path.split('/')[-1]
-                return self.handle_delete_product(product_id)
-            
-            # Employees routes
-            if path == '/api/employees' and method == 'GET':
-                return self.handle_get_employees()
-            
-            if path == '/api/employees' and method == 'POST':
-                return self.handle_create_employee()
-            
-            # Orders routes
-            if path == '/api/orders' and method == 'GET':
-                return self.handle_get_orders(query)
-            
-            if path == '/api/orders' and method == 'POST':
-                return self.handle_create_order()
-            
-            if path == '/api/orders/next-order-id' and method == 'GET':
-                return self.handle_next_order_id()
-            
-            if path.startswith('/api/orders/') and method == 'GET':
-                order_id = path.split('/')[-1]
-                return self.handle_get_order(order_id)
+            route = ROUTES_EXACT.get((method, path)) or ROUTES_EXACT.get(('*', path))
+            if route:
+                return route(self, query)
             
-            # Dashboard routes
-            if path == '/api/dashboard/stats' and method == 'GET':
-                return self.handle_dashboard_stats()
-            
-            if path == '/api/dashboard/staff-presence' and method == 'GET':
-                return self.handle_staff_presence()
-            
-            # Public routes
-            if path == '/api/public/catalogue' and method == 'GET':
-                return self.handle_public_catalogue(query)
-            
-            if path == '/api/public/categories' and method == 'GET':
-                return self.handle_public_categories()
+            for pattern, name in ROUTES_RE.get(method, ()):
+                match = pattern.match(path)
+                if match:
+                    return getattr(self, name)(**match.groupdict())
             
             return self.send_json(404, {"detail": "Not found"})
             
@@ -251,108 +463,116 @@ class handler(BaseHTTPRequestHandler):
             print(f"Traceback: {traceback.format_exc()}", flush=True)
             return self.send_json(500, {"detail": str(e), "traceback": traceback.format_exc()})
     
+    # === HEALTH HANDLERS ===
+    def handle_health(self):
+        # Test database connection
+        db_status = "unknown"
+        db_error = None
+        try:
+            if pymysql and MYSQL_HOST:
+                conn = get_db()
+                release_db(conn)
+                db_status = "connected"
+            else:
+                db_status = "not_configured"
+        except Exception as db_e:
+            db_status = "error"
+            db_error = str(db_e)
+        
+        return self.send_json(200, {
+            "status": "healthy",
+            "database": db_status,
+            "db_error": db_error,
+            "python_version": sys.version,
+            "modules": {
+                "bcrypt": bcrypt is not None,
+                "pymysql": pymysql is not None,
+                "orjson": orjson is not None
+            },
+            "env_configured": {
+                "MYSQL_HOST": bool(MYSQL_HOST),
+                "MYSQL_USER": bool(MYSQL_USER),
+                "MYSQL_DATABASE": bool(MYSQL_DATABASE)
+            }
+        })
+    
+    def handle_root(self):
+        return self.send_json(200, {"message": "Sellandiamman Traders API", "status": "running"})
+    
     # === AUTH HANDLERS ===
     def handle_login(self):
         body = self.get_body()
         email = body.get('email')
         password = body.get('password')
         
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM employees WHERE email = %s", (email,))
-                emp = cur.fetchone()
-            
-            if not emp:
-                return self.send_json(401, {"detail": "Invalid credentials"})
-            
-            if not verify_password(password, emp.get("password_hash", "")):
-                return self.send_json(401, {"detail": "Invalid credentials"})
-            
-            if emp.get("status") != "active":
-                return self.send_json(401, {"detail": "Account is inactive"})
-            
-            token = create_token(emp["id"], emp["email"], emp["role"], emp["name"])
-            
-            return self.send_json(200, {
-                "token": token,
-                "user": {
-                    "id": emp["id"],
-                    "name": emp["name"],
-                    "email": emp["email"],
-                    "role": emp["role"],
-                    "status": emp["status"],
-                    "created_at": str(emp["created_at"])
-                },
-                "force_password_change": bool(emp.get("force_password_change", 0))
-            })
-        finally:
-            conn.close()
-    
-    def handle_get_me(self):
-        user = self.get_user()
-        if not user:
-            return self.send_json(401, {"detail": "Not authenticated"})
+        with self.db_cursor(pymysql.cursors.DictCursor) as (conn, cur):
+            cur.execute("SELECT id, name, email, role, status, password_hash, force_password_change, created_at FROM employees WHERE email = %s", (email,))
+            emp = cur.fetchone()
         
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM employees WHERE id = %s", (user["user_id"],))
-                emp = cur.fetchone()
-            
-            if not emp:
-                return self.send_json(404, {"detail": "User not found"})
-            
-            return self.send_json(200, {
+        # Exactly one bcrypt check runs on every path, so response time doesn't
+        # reveal whether the email exists
+        if not emp:
+            verify_dummy_password(password)
+            return self.send_json(401, {"detail": "Invalid credentials"})
+        
+        if not verify_password(password, emp.get("password_hash", "")):
+            return self.send_json(401, {"detail": "Invalid credentials"})
+        
+        if emp.get("status") != "active":
+            return self.send_json(401, {"detail": "Account is inactive"})
+        
+        token = create_token(emp["id"], emp["email"], emp["role"], emp["name"])
+        
+        return self.send_json(200, {
+            "token": token,
+            "user": {
                 "id": emp["id"],
                 "name": emp["name"],
                 "email": emp["email"],
                 "role": emp["role"],
                 "status": emp["status"],
-                "created_at": str(emp["created_at"])
-            })
-        finally:
-            conn.close()
+                "created_at": emp["created_at"]
+            },
+            "force_password_change": bool(emp.get("force_password_change", 0))
+        })
+    
+    def handle_get_me(self):
+        user = self.get_user()
+        if not user:
+            return self.send_json(401, {"detail": "Not authenticated"})
+        
+        with self.db_cursor(pymysql.cursors.DictCursor) as (conn, cur):
+            cur.execute("SELECT id, name, email, role, status, created_at FROM employees WHERE id = %s", (user["user_id"],))
+            emp = cur.fetchone()
+        
+        if not emp:
+            return self.send_json(404, {"detail": "User not found"})
+        
+        return self.send_json(200, {
+            "id": emp["id"],
+            "name": emp["name"],
+            "email": emp["email"],
+            "role": emp["role"],
+            "status": emp["status"],
+            "created_at": emp["created_at"]
+        })
     
     # === PRODUCT HANDLERS ===
-    def handle_get_products(self, query):
+    def handle_get_products(self):
         user = self.get_user()
         if not user:
             return self.send_json(401, {"detail": "Not authenticated"})
         
-        conn = get_db()
-        try:
-            sql = "SELECT * FROM products ORDER BY product_name LIMIT 500"
-            with conn.cursor() as cur:
-                cur.execute(sql)
-                products = cur.fetchall()
-            
-            result = [{
-                "id": p["id"],
-                "sku": p["sku"],
-                "product_name": p["product_name"],
-                "category": p["category"],
-                "brand": p["brand"] or "",
-                "zone": p["zone"],
-                "aisle": p["aisle"],
-                "rack": p["rack"],
-                "shelf": p["shelf"],
-                "bin": p["bin"],
-                "full_location_code": p["full_location_code"],
-                "quantity_available": p["quantity_available"],
-                "reorder_level": p["reorder_level"],
-                "supplier": p["supplier"] or "",
-                "image_url": p["image_url"] or "",
-                "selling_price": float(p["selling_price"] or 0),
-                "mrp": float(p["mrp"] or 0),
-                "unit": p["unit"] or "piece",
-                "gst_percentage": float(p["gst_percentage"] or 18),
-                "last_updated": str(p["last_updated"])
-            } for p in products]
-            
-            return self.send_json(200, result)
-        finally:
-            conn.close()
+        payload = cached_response("products:")
+        if payload is not None:
+            return self.send_cached_bytes(200, payload)
+        
+        # The DB coalesces NULLs so rows can be zipped straight onto the field names
+        with self.db_cursor() as (conn, cur):
+            cur.execute(PRODUCT_LIST_SQL)
+            result = [dict(zip(PRODUCT_LIST_FIELDS, row)) for row in cur]
+        
+        return self.send_cached_bytes(200, store_response("products:", result))
     
     def handle_create_product(self):
         user = self.get_user()
@@ -360,75 +580,46 @@ class handler(BaseHTTPRequestHandler):
             return self.send_json(403, {"detail": "Admin access required"})
         
         body = self.get_body()
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT id FROM products WHERE sku = %s", (body["sku"],))
-                if cur.fetchone():
-                    return self.send_json(400, {"detail": "SKU already exists"})
+        with self.db_cursor() as (conn, cur):
+            cur.execute("SELECT id FROM products WHERE sku = %s", (body["sku"],))
+            if cur.fetchone():
+                return self.send_json(400, {"detail": "SKU already exists"})
             
             full_location = generate_location_code(
                 body["zone"], body["aisle"], body["rack"], body["shelf"], body["bin"]
             )
             
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO products (sku, product_name, category, brand, zone, aisle, rack, shelf, bin,
-                    full_location_code, quantity_available, reorder_level, supplier, image_url, selling_price,
-                    mrp, unit, gst_percentage, last_updated, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
-                """, (
-                    body["sku"], body["product_name"], body["category"], body.get("brand", ""),
-                    body["zone"], body["aisle"], body["rack"], body["shelf"], body["bin"],
-                    full_location, body.get("quantity_available", 0), body.get("reorder_level", 10),
-                    body.get("supplier", ""), body.get("image_url", ""), body.get("selling_price", 0),
-                    body.get("mrp", 0), body.get("unit", "piece"), body.get("gst_percentage", 18)
-                ))
-                prod_id = cur.lastrowid
+            cur.execute("""
+                INSERT INTO products (sku, product_name, category, brand, zone, aisle, rack, shelf, bin,
+                full_location_code, quantity_available, reorder_level, supplier, image_url, selling_price,
+                mrp, unit, gst_percentage, last_updated, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
+            """, (
+                body["sku"], body["product_name"], body["category"], body.get("brand", ""),
+                body["zone"], body["aisle"], body["rack"], body["shelf"], body["bin"],
+                full_location, body.get("quantity_available", 0), body.get("reorder_level", 10),
+                body.get("supplier", ""), body.get("image_url", ""), body.get("selling_price", 0),
+                body.get("mrp", 0), body.get("unit", "piece"), body.get("gst_percentage", 18)
+            ))
+            prod_id = cur.lastrowid
             conn.commit()
-            
-            return self.send_json(201, {"id": prod_id, "message": "Product created"})
-        finally:
-            conn.close()
+        
+        invalidate_product_cache()
+        return self.send_json(201, {"id": prod_id, "message": "Product created"})
     
     def handle_get_product(self, product_id):
         user = self.get_user()
         if not user:
             return self.send_json(401, {"detail": "Not authenticated"})
         
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM products WHERE id = %s", (product_id,))
-                p = cur.fetchone()
-            
-            if not p:
-                return self.send_json(404, {"detail": "Product not found"})
-            
-            return self.send_json(200, {
-                "id": p["id"],
-                "sku": p["sku"],
-                "product_name": p["product_name"],
-                "category": p["category"],
-                "brand": p["brand"] or "",
-                "zone": p["zone"],
-                "aisle": p["aisle"],
-                "rack": p["rack"],
-                "shelf": p["shelf"],
-                "bin": p["bin"],
-                "full_location_code": p["full_location_code"],
-                "quantity_available": p["quantity_available"],
-                "reorder_level": p["reorder_level"],
-                "supplier": p["supplier"] or "",
-                "image_url": p["image_url"] or "",
-                "selling_price": float(p["selling_price"] or 0),
-                "mrp": float(p["mrp"] or 0),
-                "unit": p["unit"] or "piece",
-                "gst_percentage": float(p["gst_percentage"] or 18),
-                "last_updated": str(p["last_updated"])
-            })
-        finally:
-            conn.close()
+        with self.db_cursor() as (conn, cur):
+            cur.execute(PRODUCT_BY_ID_SQL, (product_id,))
+            p = cur.fetchone()
+        
+        if not p:
+            return self.send_json(404, {"detail": "Product not found"})
+        
+        return self.send_json(200, dict(zip(PRODUCT_LIST_FIELDS, p)))
     
     def handle_update_product(self, product_id):
         user = self.get_user()
@@ -436,73 +627,71 @@ class handler(BaseHTTPRequestHandler):
             return self.send_json(403, {"detail": "Admin access required"})
         
         body = self.get_body()
-        conn = get_db()
-        try:
-            full_location = generate_location_code(
-                body["zone"], body["aisle"], body["rack"], body["shelf"], body["bin"]
-            )
-            
-            with conn.cursor() as cur:
-                cur.execute("""
-                    UPDATE products SET sku=%s, product_name=%s, category=%s, brand=%s, zone=%s,
-                    aisle=%s, rack=%s, shelf=%s, bin=%s, full_location_code=%s, quantity_available=%s,
-                    reorder_level=%s, supplier=%s, image_url=%s, selling_price=%s, mrp=%s, unit=%s,
-                    gst_percentage=%s, last_updated=NOW() WHERE id=%s
-                """, (
-                    body["sku"], body["product_name"], body["category"], body.get("brand", ""),
-                    body["zone"], body["aisle"], body["rack"], body["shelf"], body["bin"],
-                    full_location, body.get("quantity_available", 0), body.get("reorder_level", 10),
-                    body.get("supplier", ""), body.get("image_url", ""), body.get("selling_price", 0),
-                    body.get("mrp", 0), body.get("unit", "piece"), body.get("gst_percentage", 18),
-                    product_id
-                ))
+        full_location = generate_location_code(
+            body["zone"], body["aisle"], body["rack"], body["shelf"], body["bin"]
+        )
+        
+        with self.db_cursor() as (conn, cur):
+            cur.execute("""
+                UPDATE products SET sku=%s, product_name=%s, category=%s, brand=%s, zone=%s,
+                aisle=%s, rack=%s, shelf=%s, bin=%s, full_location_code=%s, quantity_available=%s,
+                reorder_level=%s, supplier=%s, image_url=%s, selling_price=%s, mrp=%s, unit=%s,
+                gst_percentage=%s, last_updated=NOW() WHERE id=%s
+            """, (
+                body["sku"], body["product_name"], body["category"], body.get("brand", ""),
+                body["zone"], body["aisle"], body["rack"], body["shelf"], body["bin"],
+                full_location, body.get("quantity_available", 0), body.get("reorder_level", 10),
+                body.get("supplier", ""), body.get("image_url", ""), body.get("selling_price", 0),
+                body.get("mrp", 0), body.get("unit", "piece"), body.get("gst_percentage", 18),
+                product_id
+            ))
             conn.commit()
-            
-            return self.send_json(200, {"message": "Product updated"})
-        finally:
-            conn.close()
+        
+        invalidate_product_cache()
+        return self.send_json(200, {"message": "Product updated"})
     
     def handle_delete_product(self, product_id):
         user = self.get_user()
         if not user or user.get("role") != "admin":
             return self.send_json(403, {"detail": "Admin access required"})
         
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("DELETE FROM products WHERE id = %s", (product_id,))
+        with self.db_cursor() as (conn, cur):
+            cur.execute("DELETE FROM products WHERE id = %s", (product_id,))
             conn.commit()
-            return self.send_json(200, {"message": "Product deleted"})
-        finally:
-            conn.close()
+        
+        invalidate_product_cache()
+        return self.send_json(200, {"message": "Product deleted"})
     
     def handle_get_categories(self):
         user = self.get_user()
         if not user:
             return self.send_json(401, {"detail": "Not authenticated"})
         
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT DISTINCT category FROM products WHERE category IS NOT NULL ORDER BY category")
-                cats = cur.fetchall()
-            return self.send_json(200, [c["category"] for c in cats if c["category"]])
-        finally:
-            conn.close()
+        return self.send_cached_bytes(200, self.categories_payload())
+    
+    def categories_payload(self):
+        # Shared by the staff and public category endpoints
+        payload = cached_response("categories:")
+        if payload is None:
+            with self.db_cursor() as (conn, cur):
+                # Trigger-maintained in backend/schema.sql, so no scan of products
+                cur.execute("SELECT name FROM categories ORDER BY name")
+                payload = store_response("categories:", [c[0] for c in cur], LOOKUP_CACHE_TTL)
+        return payload
     
     def handle_get_zones(self):
         user = self.get_user()
         if not user:
             return self.send_json(401, {"detail": "Not authenticated"})
         
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT DISTINCT zone FROM products WHERE zone IS NOT NULL ORDER BY zone")
-                zones = cur.fetchall()
-            return self.send_json(200, [z["zone"] for z in zones if z["zone"]])
-        finally:
-            conn.close()
+        payload = cached_response("zones:")
+        if payload is not None:
+            return self.send_cached_bytes(200, payload)
+        
+        with self.db_cursor() as (conn, cur):
+            cur.execute("SELECT DISTINCT zone FROM products WHERE zone IS NOT NULL ORDER BY zone")
+            zones = cur.fetchall()
+        return self.send_cached_bytes(200, store_response("zones:", [z[0] for z in zones if z[0]], LOOKUP_CACHE_TTL))
     
     # === EMPLOYEE HANDLERS ===
     def handle_get_employees(self):
@@ -510,25 +699,15 @@ class handler(BaseHTTPRequestHandler):
         if not user or user.get("role") != "admin":
             return self.send_json(403, {"detail": "Admin access required"})
         
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM employees ORDER BY created_at DESC")
-                employees = cur.fetchall()
-            
-            result = [{
-                "id": e["id"],
-                "name": e["name"],
-                "email": e["email"],
-                "role": e["role"],
-                "status": e["status"],
-                "presence_status": e.get("presence_status", "present"),
-                "created_at": str(e["created_at"])
-            } for e in employees]
-            
-            return self.send_json(200, result)
-        finally:
-            conn.close()
+        with self.db_cursor() as (conn, cur):
+            cur.execute("SELECT id, name, email, role, status, presence_status, created_at FROM employees ORDER BY created_at DESC")
+            result = [
+                {"id": emp_id, "name": name, "email": email, "role": role, "status": status,
+                 "presence_status": presence_status, "created_at": created_at}
+                for emp_id, name, email, role, status, presence_status, created_at in cur
+            ]
+        
+        return self.send_json(200, result)
     
     def handle_create_employee(self):
         user = self.get_user()
@@ -536,23 +715,19 @@ class handler(BaseHTTPRequestHandler):
             return self.send_json(403, {"detail": "Admin access required"})
         
         body = self.get_body()
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT id FROM employees WHERE email = %s", (body["email"],))
-                if cur.fetchone():
-                    return self.send_json(400, {"detail": "Email already exists"})
-                
-                cur.execute("""
-                    INSERT INTO employees (name, email, role, status, password_hash, presence_status, created_at)
-                    VALUES (%s, %s, %s, 'active', %s, 'present', NOW())
-                """, (body["name"], body["email"], body.get("role", "staff"), hash_password(body["password"])))
-                emp_id = cur.lastrowid
+        with self.db_cursor() as (conn, cur):
+            cur.execute("SELECT id FROM employees WHERE email = %s", (body["email"],))
+            if cur.fetchone():
+                return self.send_json(400, {"detail": "Email already exists"})
+            
+            cur.execute("""
+                INSERT INTO employees (name, email, role, status, password_hash, presence_status, created_at)
+                VALUES (%s, %s, %s, 'active', %s, 'present', NOW())
+            """, (body["name"], body["email"], body.get("role", "staff"), hash_password(body["password"])))
+            emp_id = cur.lastrowid
             conn.commit()
-            
-            return self.send_json(201, {"id": emp_id, "message": "Employee created"})
-        finally:
-            conn.close()
+        
+        return self.send_json(201, {"id": emp_id, "message": "Employee created"})
     
     # === ORDER HANDLERS ===
     def handle_get_orders(self, query):
@@ -560,63 +735,37 @@ class handler(BaseHTTPRequestHandler):
         if not user:
             return self.send_json(401, {"detail": "Not authenticated"})
         
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM orders ORDER BY created_at DESC LIMIT 100")
-                orders = cur.fetchall()
-            
-            result = []
-            for o in orders:
-                with conn.cursor() as cur:
-                    cur.execute("SELECT * FROM order_items WHERE order_id = %s", (o["id"],))
-                    items = cur.fetchall()
-                
-                result.append({
-                    "id": o["id"],
-                    "order_number": o["order_number"],
-                    "customer_name": o["customer_name"],
-                    "created_by": o["created_by"],
-                    "created_by_name": o["created_by_name"],
-                    "status": o["status"],
-                    "created_at": str(o["created_at"]),
-                    "items": [{
-                        "id": i["id"],
-                        "sku": i["sku"],
-                        "product_name": i["product_name"],
-                        "full_location_code": i["full_location_code"],
-                        "quantity_required": i["quantity_required"],
-                        "quantity_available": i["quantity_available"],
-                        "picking_status": i["picking_status"]
-                    } for i in items]
-                })
-            
-            return self.send_json(200, result)
-        finally:
-            conn.close()
+        # Tuple rows zipped onto the field names; dict(zip()) builds each row in C
+        with self.db_cursor() as (conn, cur):
+            cur.execute(f"SELECT {ORDER_COLUMNS} FROM orders ORDER BY created_at DESC LIMIT 100")
+            orders = cur.fetchall()
+            
+            # Fetch every order's items in one query and bucket them by order
+            items_by_order = defaultdict(list)
+            if orders:
+                ids = [o[0] for o in orders]
+                cur.execute(
+                    f"SELECT {ORDER_ITEM_COLUMNS} FROM order_items WHERE order_id IN (" + ",".join(["%s"] * len(ids)) + ")",
+                    ids
+                )
+                for row in cur:
+                    items_by_order[row[0]].append(dict(zip(ORDER_ITEM_FIELDS, row[1:])))
+        
+        result = [dict(zip(ORDER_FIELDS, o), items=items_by_order[o[0]]) for o in orders]
+        
+        return self.send_json(200, result)
     
     def handle_next_order_id(self):
         user = self.get_user()
         if not user:
             return self.send_json(401, {"detail": "Not authenticated"})
         
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT order_number FROM orders WHERE order_number REGEXP '^ORD-[0-9]{4}$'
-                    ORDER BY CAST(SUBSTRING(order_number, 5) AS UNSIGNED) DESC LIMIT 1
-                """)
-                result = cur.fetchone()
-            
-            if result:
-                next_num = int(result["order_number"][4:]) + 1
-            else:
-                next_num = 1
-            
-            return self.send_json(200, {"next_order_id": f"ORD-{str(next_num).zfill(4)}"})
-        finally:
-            conn.close()
+        with self.db_cursor() as (conn, cur):
+            cur.execute("SELECT next_val + 1 FROM order_counter WHERE id = 1")
+            result = cur.fetchone()
+        
+        next_num = result[0] if result else 1
+        return self.send_json(200, {"next_order_id": f"ORD-{str(next_num).zfill(4)}"})
     
     def handle_create_order(self):
         user = self.get_user()
@@ -624,90 +773,69 @@ class handler(BaseHTTPRequestHandler):
             return self.send_json(401, {"detail": "Not authenticated"})
         
         body = self.get_body()
-        conn = get_db()
-        try:
-            # Generate order number
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT order_number FROM orders WHERE order_number REGEXP '^ORD-[0-9]{4}$'
-                    ORDER BY CAST(SUBSTRING(order_number, 5) AS UNSIGNED) DESC LIMIT 1
-                """)
-                result = cur.fetchone()
-            
+        with self.db_cursor() as (conn, cur):
             if body.get("order_id"):
                 order_number = body["order_id"].strip().upper()
-            elif result:
-                next_num = int(result["order_number"][4:]) + 1
-                order_number = f"ORD-{str(next_num).zfill(4)}"
             else:
-                order_number = "ORD-0001"
-            
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO orders (order_number, customer_name, created_by, created_by_name, status, created_at)
-                    VALUES (%s, %s, %s, %s, 'pending', NOW())
-                """, (order_number, body["customer_name"], user["user_id"], user["name"]))
-                order_id = cur.lastrowid
+                # Allocate the next number atomically; the row lock is held until commit
+                if not cur.execute("UPDATE order_counter SET next_val = LAST_INSERT_ID(next_val + 1) WHERE id = 1"):
+                    raise Exception("order_counter is not initialised - apply backend/schema.sql")
+                cur.execute("SELECT LAST_INSERT_ID()")
+                next_num = cur.fetchone()[0]
+                order_number = f"ORD-{str(next_num).zfill(4)}"
             
-            for item in body.get("items", []):
-                with conn.cursor() as cur:
-                    cur.execute("SELECT * FROM products WHERE sku = %s", (item["sku"],))
-                    product = cur.fetchone()
+            cur.execute("""
+                INSERT INTO orders (order_number, customer_name, created_by, created_by_name, status, created_at)
+                VALUES (%s, %s, %s, %s, 'pending', NOW())
+            """, (order_number, body["customer_name"], user["user_id"], user["name"]))
+            order_id = cur.lastrowid
+            
+            # Look up every SKU at once and insert all the items in one statement
+            items = body.get("items", [])
+            skus = [item["sku"] for item in items]
+            if skus:
+                cur.execute(
+                    "SELECT sku, product_name, full_location_code, quantity_available FROM products WHERE sku IN ("
+                    + ",".join(["%s"] * len(skus)) + ")",
+                    skus
+                )
+                # Key case-insensitively to match the column's collation
+                products_by_sku = {p[0].lower(): p for p in cur.fetchall()}
                 
-                if product:
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            INSERT INTO order_items (order_id, sku, product_name, full_location_code,
-                            quantity_required, quantity_available, picking_status)
-                            VALUES (%s, %s, %s, %s, %s, %s, 'pending')
-                        """, (
-                            order_id, item["sku"], product["product_name"], product["full_location_code"],
-                            item["quantity_required"], product["quantity_available"]
-                        ))
+                # Every value is a placeholder so pymysql can fold executemany into one
+                # multi-row INSERT; a literal in VALUES makes it fall back to one per row
+                rows = [
+                    (order_id, item["sku"], product[1], product[2], item["quantity_required"], product[3], 'pending')
+                    for item in items
+                    if (product := products_by_sku.get(item["sku"].lower()))
+                ]
+                if rows:
+                    cur.executemany("""
+                        INSERT INTO order_items (order_id, sku, product_name, full_location_code,
+                        quantity_required, quantity_available, picking_status)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """, rows)
             
             conn.commit()
-            return self.send_json(201, {"id": order_id, "order_number": order_number})
-        finally:
-            conn.close()
+        
+        return self.send_json(201, {"id": order_id, "order_number": order_number})
     
     def handle_get_order(self, order_id):
         user = self.get_user()
         if not user:
             return self.send_json(401, {"detail": "Not authenticated"})
         
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM orders WHERE id = %s", (order_id,))
-                o = cur.fetchone()
+        with self.db_cursor() as (conn, cur):
+            cur.execute(f"SELECT {ORDER_COLUMNS} FROM orders WHERE id = %s", (order_id,))
+            o = cur.fetchone()
             
             if not o:
                 return self.send_json(404, {"detail": "Order not found"})
             
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM order_items WHERE order_id = %s", (order_id,))
-                items = cur.fetchall()
-            
-            return self.send_json(200, {
-                "id": o["id"],
-                "order_number": o["order_number"],
-                "customer_name": o["customer_name"],
-                "created_by": o["created_by"],
-                "created_by_name": o["created_by_name"],
-                "status": o["status"],
-                "created_at": str(o["created_at"]),
-                "items": [{
-                    "id": i["id"],
-                    "sku": i["sku"],
-                    "product_name": i["product_name"],
-                    "full_location_code": i["full_location_code"],
-                    "quantity_required": i["quantity_required"],
-                    "quantity_available": i["quantity_available"],
-                    "picking_status": i["picking_status"]
-                } for i in items]
-            })
-        finally:
-            conn.close()
+            cur.execute(f"SELECT {ORDER_ITEM_COLUMNS} FROM order_items WHERE order_id = %s", (order_id,))
+            items = [dict(zip(ORDER_ITEM_FIELDS, row[1:])) for row in cur]
+        
+        return self.send_json(200, dict(zip(ORDER_FIELDS, o), items=items))
     
     # === DASHBOARD HANDLERS ===
     def handle_dashboard_stats(self):
@@ -715,92 +843,80 @@ class handler(BaseHTTPRequestHandler):
         if not user:
             return self.send_json(401, {"detail": "Not authenticated"})
         
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT COUNT(*) as cnt FROM products")
-                total_products = cur.fetchone()["cnt"]
-                
-                cur.execute("SELECT COALESCE(SUM(quantity_available), 0) as total FROM products")
-                total_stock = int(cur.fetchone()["total"])
-                
-                cur.execute("SELECT COUNT(*) as cnt FROM products WHERE quantity_available <= reorder_level")
-                low_stock = cur.fetchone()["cnt"]
-                
-                cur.execute("SELECT COUNT(*) as cnt FROM orders WHERE DATE(created_at) = CURDATE()")
-                sales_today = cur.fetchone()["cnt"]
-                
-                cur.execute("SELECT COUNT(*) as cnt FROM orders WHERE status = 'pending'")
-                orders_pending = cur.fetchone()["cnt"]
-                
-                cur.execute("SELECT COUNT(*) as cnt FROM orders WHERE status = 'completed'")
-                orders_completed = cur.fetchone()["cnt"]
-            
-            return self.send_json(200, {
-                "total_products": total_products,
-                "total_stock_units": total_stock,
-                "low_stock_items": low_stock,
-                "sales_today": sales_today,
-                "orders_pending": orders_pending,
-                "orders_completed": orders_completed
-            })
-        finally:
-            conn.close()
+        # One pass over each table using conditional aggregation
+        with self.db_cursor() as (conn, cur):
+            cur.execute("""
+                SELECT COUNT(*) AS total, COALESCE(SUM(quantity_available), 0) AS stock,
+                COALESCE(SUM(quantity_available <= reorder_level), 0) AS low FROM products
+            """)
+            total_products, stock, low = cur.fetchone()
+            
+            cur.execute("""
+                SELECT COALESCE(SUM(created_at >= CURDATE() AND created_at < CURDATE() + INTERVAL 1 DAY), 0) AS today,
+                COALESCE(SUM(status = 'pending'), 0) AS pending,
+                COALESCE(SUM(status = 'completed'), 0) AS completed FROM orders
+            """)
+            today, pending, completed = cur.fetchone()
+        
+        return self.send_json(200, {
+            "total_products": total_products,
+            "total_stock_units": int(stock),
+            "low_stock_items": int(low),
+            "sales_today": int(today),
+            "orders_pending": int(pending),
+            "orders_completed": int(completed)
+        })
     
     def handle_staff_presence(self):
         user = self.get_user()
         if not user:
             return self.send_json(401, {"detail": "Not authenticated"})
         
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM employees")
-                employees = cur.fetchall()
-            
-            result = [{
-                "id": e["id"],
-                "name": e["name"],
-                "role": e["role"],
-                "presence_status": e.get("presence_status", "present")
-            } for e in employees]
-            
-            return self.send_json(200, result)
-        finally:
-            conn.close()
+        with self.db_cursor() as (conn, cur):
+            cur.execute("SELECT id, name, role, presence_status FROM employees")
+            result = [
+                {"id": emp_id, "name": name, "role": role, "presence_status": presence_status}
+                for emp_id, name, role, presence_status in cur
+            ]
+        
+        return self.send_json(200, result)
     
     # === PUBLIC HANDLERS ===
-    def handle_public_catalogue(self, query):
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT sku, product_name, category, brand, image_url, selling_price, mrp, unit
-                    FROM products ORDER BY product_name LIMIT 100
-                """)
-                products = cur.fetchall()
-            
-            result = [{
-                "sku": p["sku"],
-                "product_name": p["product_name"],
-                "category": p["category"],
-                "brand": p["brand"] or "",
-                "image_url": p["image_url"] or "",
-                "selling_price": float(p["selling_price"] or 0),
-                "mrp": float(p["mrp"] or 0),
-                "unit": p["unit"] or "piece"
-            } for p in products]
-            
-            return self.send_json(200, result)
-        finally:
-            conn.close()
+    def catalogue_payload(self, cache_key):
+        payload = cached_response(cache_key)
+        if payload is None:
+            with self.db_cursor() as (conn, cur):
+                cur.execute(CATALOGUE_SQL)
+                payload = store_response(cache_key, [dict(zip(CATALOGUE_FIELDS, row)) for row in cur])
+        return payload
+    
+    def handle_public_catalogue(self):
+        cache_key = "catalogue:"
+        payload = self.catalogue_payload(cache_key)
+        
+        # Clients that already hold this body get a bodiless 304. The ETag is taken
+        # from the uncompressed bytes, so it holds for either encoding.
+        headers = {'ETag': cached_etag(cache_key, payload), 'Vary': 'Accept-Encoding'}
+        if etag_matches(self.headers.get('If-None-Match'), headers['ETag']):
+            return self.send_not_modified(headers)
+        if accepts_gzip(self.headers.get('Accept-Encoding')):
+            headers['Content-Encoding'] = 'gzip'
+            return self.send_cached_bytes(200, cached_gzip(cache_key, payload), headers)
+        return self.send_cached_bytes(200, payload, headers)
     
     def handle_public_categories(self):
-        conn = get_db()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT DISTINCT category FROM products WHERE category IS NOT NULL ORDER BY category")
-                cats = cur.fetchall()
-            return self.send_json(200, [c["category"] for c in cats if c["category"]])
-        finally:
-            conn.close()
+        return self.send_cached_bytes(200, self.categories_payload())
+    
+    def handle_public_bootstrap(self):
+        # Categories and the first catalogue page in one response, spliced from the
+        # two cached bodies rather than encoded again
+        return self.send_cached_bytes(
+            200, b'{"categories":' + self.categories_payload() + b',"products":' + self.catalogue_payload("catalogue:") + b'}'
+        )
+
+# Long-lived deployments (e.g. under PyPy, where the JIT needs a warm process) can
+# serve the same handler directly instead of through Vercel's per-request runtime
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', '8000'))
+    print(f"Serving on port {port}", flush=True)
+    ThreadingHTTPServer(('', port), handler).serve_forever()